@@ -1,15 +1,175 @@
 Here’s a class-based context manager that handles opening and closing a database connection automatically:
+import os
+import glob
+import time
+import atexit
+import sys
+import queue
 import sqlite3
+import threading
+import traceback
+
+# Named PRAGMA sets applied when the connection is opened
+# (same profiles as with_db_connection in python-decorators-0x01)
+CONNECTION_PROFILES = {
+    "read_heavy": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,  # negative = KiB, so 64 MiB
+    },
+    "write_heavy": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -16 * 1024,
+    },
+    "bulk_load": {
+        "journal_mode": "MEMORY",  # no durability: only for loads you can redo
+        "synchronous": "OFF",
+        "mmap_size": 0,
+        "cache_size": -256 * 1024,
+    },
+}
+
+# Read-only copies of a live database, refreshed every `interval` seconds with
+# the backup API, for long reads that can live with slightly old data
+class SnapshotManager:
+    def __init__(self, db_file, interval=60.0, keep=2, mmap_size=1024 * 1024 * 1024):
+        self.db_file = db_file
+        self.interval = interval
+        self.keep = keep
+        self.mmap_size = mmap_size
+        self._snapshots = []  # [(taken at, path)], oldest first
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # Snapshot files are named <root>.snapshot-<pid>-<ms><ext>, so each process
+    # only ever deletes its own, plus those left behind by processes that died
+    def _path(self, pid, stamp):
+        root, ext = os.path.splitext(self.db_file)
+        return f"{root}.snapshot-{pid}-{stamp}{ext}"
+
+    def _prune_leftovers(self):
+        for path in glob.glob(self._path("*", "*")) + glob.glob(self._path("*", "*") + ".tmp"):
+            pid = os.path.basename(path).split(".snapshot-", 1)[1].split("-", 1)[0]
+            if pid.isdigit() and (int(pid) == os.getpid() or not _process_alive(int(pid))):
+                _remove(path)
+
+    def take(self):
+        taken_at = time.time()  # the copy is consistent as of the start of the backup
+        path = self._path(os.getpid(), int(taken_at * 1000))
+        source = sqlite3.connect(self.db_file)
+        target = sqlite3.connect(path + ".tmp")
+        try:
+            # One step: the whole copy is read in a single read transaction,
+            # which (in WAL mode) doesn't block writers
+            source.backup(target)
+            # The copy inherits WAL mode; a plain read-only file needs no -wal/-shm
+            target.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            target.close()
+            source.close()
+        os.replace(path + ".tmp", path)  # readers never see a half-written file
+        with self._lock:
+            self._snapshots.append((taken_at, path))
+            old, self._snapshots = self._snapshots[:-self.keep], self._snapshots[-self.keep:]
+        for _, old_path in old:
+            _remove(old_path)  # connections still open on it keep reading it
+        return path
+
+    def start(self):
+        if self._thread is None:
+            self._prune_leftovers()
+            self.take()  # so stale-tolerant reads can use a snapshot right away
+            self._thread = threading.Thread(target=self._run, name=f"snapshots:{self.db_file}", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.take()
+            except Exception as e:  # sqlite3.Error, or OSError from the copy or rename
+                print(f"[SNAPSHOT] Copy of {self.db_file} failed: {e}")
+
+    # Stops refreshing and deletes this process's snapshot files
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            snapshots, self._snapshots = self._snapshots, []
+        for _, path in snapshots:
+            _remove(path)
+        self._prune_leftovers()
+
+    # Newest snapshot no older than max_staleness seconds, or None
+    def newest(self, max_staleness):
+        with self._lock:
+            if self._snapshots:
+                taken_at, path = self._snapshots[-1]
+                if time.time() - taken_at <= max_staleness:
+                    return path
+        return None
+
+    def connect(self, path):
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+        return conn
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # exists, but belongs to someone else
+    return True
+
+_snapshot_managers = {}
+_snapshot_managers_lock = threading.Lock()
+
+@atexit.register
+def _stop_snapshot_managers():
+    for manager in list(_snapshot_managers.values()):
+        manager.stop()
+
+def enable_snapshots(db_file, interval=60.0, keep=2, mmap_size=1024 * 1024 * 1024):
+    with _snapshot_managers_lock:
+        if db_file not in _snapshot_managers:
+            _snapshot_managers[db_file] = SnapshotManager(db_file, interval, keep, mmap_size).start()
+        return _snapshot_managers[db_file]
 
 # Class-based context manager for database connections
 class DatabaseConnection:
-    def __init__(self, db_file):
+    def __init__(self, db_file, profile=None, stale_ok=False, max_staleness=60.0):
         self.db_file = db_file
+        self.profile = profile
+        self.stale_ok = stale_ok
+        self.max_staleness = max_staleness
+        self.snapshot = None  # path of the snapshot this connection reads, if any
         self.conn = None
 
     def __enter__(self):
+        # Stale-tolerant reads go to a fresh enough snapshot when there is one
+        manager = _snapshot_managers.get(self.db_file) if self.stale_ok else None
+        self.snapshot = manager.newest(self.max_staleness) if manager else None
+        if self.snapshot is not None:
+            self.conn = manager.connect(self.snapshot)
+            return self.conn
         # Open the connection
         self.conn = sqlite3.connect(self.db_file)
+        if self.profile is not None:
+            for pragma, value in CONNECTION_PROFILES[self.profile].items():
+                self.conn.execute(f"PRAGMA {pragma}={value}")
         return self.conn  # This will be assigned to the variable after 'as'
 
     def __exit__(self, exc_type, exc_value, traceback):
@@ -19,6 +179,132 @@ class DatabaseConnection:
         # Returning False will propagate exceptions (good for debugging)
         return False
 
+# Bounded pool of open connections shared by every PooledDatabaseConnection
+# for the same database file and profile
+class ConnectionPool:
+    def __init__(self, db_file, size=5, timeout=5.0, leak_threshold=30.0, profile=None):
+        self.db_file = db_file
+        self.size = size
+        self.timeout = timeout
+        self.leak_threshold = leak_threshold
+        self.profile = profile
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._checked_out = {}  # id(conn) -> [checkout time, stack, already reported]
+        if leak_threshold:
+            threading.Thread(target=self._watch_for_leaks, name=f"pool-leaks:{db_file}", daemon=True).start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)  # handed between threads
+        if self.profile is not None:
+            for pragma, value in CONNECTION_PROFILES[self.profile].items():
+                conn.execute(f"PRAGMA {pragma}={value}")
+        return conn
+
+    def checkout(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    conn = self._connect()
+                except BaseException:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(
+                        f"no connection to {self.db_file} free within {self.timeout}s "
+                        f"(pool size {self.size}, all checked out)"
+                    ) from None
+        if self.leak_threshold:
+            # Only the innermost frames, and no source lines: those are read
+            # when a leak is actually reported, not on every checkout
+            stack = traceback.StackSummary.extract(traceback.walk_stack(sys._getframe(1)), limit=4, lookup_lines=False)
+            stack.reverse()
+            with self._lock:
+                self._checked_out[id(conn)] = [time.monotonic(), stack, False]
+        return conn
+
+    def checkin(self, conn):
+        if self.leak_threshold:
+            with self._lock:
+                self._checked_out.pop(id(conn), None)
+        try:
+            if conn.in_transaction:
+                conn.rollback()  # never hand the next user someone else's half-done transaction
+        except sqlite3.Error:
+            conn.close()  # broken: drop it and let the pool open a new one
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(conn)
+
+    def _watch_for_leaks(self):
+        while True:
+            time.sleep(self.leak_threshold / 2)
+            now = time.monotonic()
+            with self._lock:
+                leaked = [info for info in self._checked_out.values()
+                          if not info[2] and now - info[0] > self.leak_threshold]
+                for info in leaked:
+                    info[2] = True  # report each checkout once
+            for started, stack, _ in leaked:
+                print(
+                    f"[POOL] Connection to {self.db_file} held for {now - started:.1f}s "
+                    f"(> {self.leak_threshold}s), checked out at:\n{''.join(traceback.format_list(stack[-3:]))}"
+                )
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+POOL_DEFAULTS = {"size": 5, "timeout": 5.0, "leak_threshold": 30.0}
+
+# Settings left as None mean "the defaults, or whatever the existing pool uses";
+# asking for different ones than the existing pool raises
+def get_pool(db_file, size=None, timeout=None, leak_threshold=None, profile=None):
+    requested = {"size": size, "timeout": timeout, "leak_threshold": leak_threshold}
+    with _pools_lock:
+        key = (db_file, profile)
+        pool = _pools.get(key)
+        if pool is None:
+            settings = {name: POOL_DEFAULTS[name] if value is None else value for name, value in requested.items()}
+            pool = _pools[key] = ConnectionPool(db_file, profile=profile, **settings)
+            return pool
+        conflicts = [f"{name}={value} (pool has {getattr(pool, name)})"
+                     for name, value in requested.items() if value is not None and value != getattr(pool, name)]
+        if conflicts:
+            raise ValueError(f"pool for {db_file} already exists with other settings: {', '.join(conflicts)}")
+        return pool
+
+# Same with interface as DatabaseConnection, but borrows a pooled connection
+class PooledDatabaseConnection:
+    def __init__(self, db_file, pool_size=None, timeout=None, leak_threshold=None, profile=None):
+        self.pool = get_pool(db_file, pool_size, timeout, leak_threshold, profile)
+        self.conn = None
+
+    def __enter__(self):
+        # Check a connection out of the shared pool
+        self.conn = self.pool.checkout()
+        return self.conn
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Roll back anything uncommitted and give the connection back
+        if self.conn:
+            self.pool.checkin(self.conn)
+            self.conn = None
+        return False
+
 # Using the context manager with 'with' statement
 with DatabaseConnection('users.db') as conn:
     cursor = conn.cursor()
@@ -26,6 +312,22 @@ with DatabaseConnection('users.db') as conn:
     results = cursor.fetchall()
     print(results)
 
+# Same thing with a connection profile for a read-mostly workload
+with DatabaseConnection('users.db', profile="read_heavy") as conn:
+    print(conn.execute("PRAGMA journal_mode").fetchone())
+
+# Pooled: the second block reuses the first block's connection
+with PooledDatabaseConnection('users.db', pool_size=5, timeout=2.0, leak_threshold=30.0) as conn:
+    first = conn
+    print(conn.execute("SELECT COUNT(*) FROM users").fetchone())
+with PooledDatabaseConnection('users.db') as conn:
+    print(conn is first)
+
+# Snapshots every 5 minutes; this report can read data up to 10 minutes old
+enable_snapshots('users.db', interval=300)
+with DatabaseConnection('users.db', stale_ok=True, max_staleness=600) as conn:
+    print(conn.execute("SELECT age, COUNT(*) FROM users GROUP BY age").fetchall()[:3])
+
 How it works:
 
 __enter__ opens the connection and returns it to the with statement.
@@ -33,3 +335,9 @@ __enter__ opens the connection and returns it to the with statement.
 __exit__ ensures the connection is closed when exiting the block, even if an error occurs.
 
 You can now safely perform queries without manually opening/closing the connection.
+
+PooledDatabaseConnection has the same with interface, but __enter__ checks a connection out of a ConnectionPool shared by every PooledDatabaseConnection for that file and profile, and __exit__ rolls back any uncommitted transaction and puts the connection back instead of closing it. The pool opens at most pool_size connections. When they are all in use, __enter__ waits up to timeout seconds and then raises TimeoutError. A watcher thread prints where a connection was checked out if it is held longer than leak_threshold seconds. Only the innermost few frames are captured at checkout, without reading source lines, and nothing is captured with leak_threshold=0. pool_size, timeout and leak_threshold default to 5, 5.0 and 30.0 when the pool is created. Later callers can leave them out to share the pool as it is; passing different values for an existing pool raises ValueError instead of being silently ignored.
+
+profile="read_heavy" | "write_heavy" | "bulk_load" applies that profile's PRAGMAs (journal_mode, synchronous, mmap_size, cache_size) right after connecting. The benchmarks behind the settings are in python-decorators-0x01/10-connection_profiles.py.
+
+enable_snapshots(db_file, interval=60.0) starts a SnapshotManager that copies the live database into a read-only snapshot file with the sqlite3 backup API right away, and then every interval seconds in a background thread. Each copy is written to a temporary file and renamed into place, and only the newest keep snapshots are kept. Snapshot files carry the process id (users.snapshot-<pid>-<ms>.db). stop(), which also runs at exit, joins the refresher thread and deletes the process's snapshots, and start() first deletes any snapshot files left by processes that are no longer running. A failed refresh (an SQLite error, or an OSError from the copy or the rename) is reported and retried at the next interval instead of stopping the refresher. DatabaseConnection(db_file, stale_ok=True, max_staleness=...) marks a read as stale-tolerant. If the newest snapshot was taken within max_staleness seconds, the connection opens that snapshot with mode=ro and a large mmap_size instead of the live file, and .snapshot holds its path. Otherwise (or with stale_ok=False) it opens the live database as usual. Long analytical reads can then run on a copy without holding read transactions on the live database, which in WAL mode stop checkpoints from completing and let the WAL grow while writers keep going. Writes always go to the live database: a snapshot connection is read-only and raises if you try to write.
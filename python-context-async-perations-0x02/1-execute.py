@@ -1,32 +1,127 @@
 a reusable class-based context manager that executes a query and returns the results, handling both connection and execution automatically. Here’s a clean implementation:
+import time
+import os
 import sqlite3
 
+# Lazy view of a cursor: rows are pulled batch_size at a time with fetchmany,
+# so at most one batch is held in memory whatever the size of the result
+class QueryStream:
+    def __init__(self, cursor, batch_size):
+        self.cursor = cursor
+        self.batch_size = batch_size
+
+    def batches(self):
+        while True:
+            batch = self.cursor.fetchmany(self.batch_size)
+            if not batch:
+                return
+            yield batch
+            if len(batch) < self.batch_size:
+                return
+
+    def __iter__(self):
+        for batch in self.batches():
+            yield from batch
+
 # Context manager that executes a query automatically
 class ExecuteQuery:
-    def __init__(self, db_file, query, params=None):
+    def __init__(self, db_file, query, params=None, stream=False, batch_size=500):
         self.db_file = db_file
         self.query = query
         self.params = params or ()
+        self.stream = stream
+        self.batch_size = batch_size
         self.conn = None
+        self.cursor = None
         self.results = None
 
     def __enter__(self):
         # Open connection
         self.conn = sqlite3.connect(self.db_file)
-        cursor = self.conn.cursor()
-        # Execute query with parameters
-        cursor.execute(self.query, self.params)
+        try:
+            self.cursor = self.conn.cursor()
+            # Execute query with parameters
+            self.cursor.execute(self.query, self.params)
+        except BaseException:
+            # __exit__ doesn't run if __enter__ raises, so clean up here
+            self.conn.close()
+            raise
+        if self.stream:
+            # Rows are fetched lazily inside the with block
+            self.results = QueryStream(self.cursor, self.batch_size)
+            return self.results
         # Fetch results
-        self.results = cursor.fetchall()
+        self.results = self.cursor.fetchall()
         return self.results  # returned to the 'as' variable
 
     def __exit__(self, exc_type, exc_value, traceback):
-        # Close connection
+        # Release the cursor and close connection
+        if self.cursor:
+            self.cursor.close()
         if self.conn:
             self.conn.close()
         # Propagate exceptions if any
         return False
 
+# Write-side counterpart: rows appended inside the with block are buffered and
+# written with executemany, one transaction per chunk_size rows
+class BulkWriter:
+    def __init__(self, db_file, sql, chunk_size=1000, checkpoint_after=None):
+        self.db_file = db_file
+        self.sql = sql
+        self.chunk_size = chunk_size
+        self.checkpoint_after = checkpoint_after  # rows; checkpoint the WAL after loads at least this big
+        self.conn = None
+        self.buffer = []
+        self.rows_written = 0
+        self.elapsed = 0.0
+        self._start = None
+
+    def __enter__(self):
+        self.conn = sqlite3.connect(self.db_file)
+        self._start = time.perf_counter()
+        return self
+
+    def append(self, row):
+        self.buffer.append(row)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def flush(self):
+        if not self.buffer:
+            return
+        # Commits the chunk, or rolls it back if executemany fails
+        with self.conn:
+            self.conn.executemany(self.sql, self.buffer)
+        self.rows_written += len(self.buffer)
+        self.buffer.clear()
+
+    @property
+    def rows_per_second(self):
+        return self.rows_written / self.elapsed if self.elapsed else 0.0
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                # Write what is left
+                self.flush()
+                if self.checkpoint_after is not None and self.rows_written >= self.checkpoint_after:
+                    # Move the load out of the WAL now instead of on some later commit
+                    self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            else:
+                # Drop the chunk in progress; chunks already flushed stay committed
+                if self.conn.in_transaction:
+                    self.conn.rollback()
+                self.buffer.clear()
+        finally:
+            self.elapsed = time.perf_counter() - self._start
+            self.conn.close()
+        return False
+
 # Using the context manager
 query = "SELECT * FROM users WHERE age > ?"
 params = (25,)
@@ -34,6 +129,30 @@ params = (25,)
 with ExecuteQuery('users.db', query, params) as results:
     print(results)
 
+# Streaming: rows arrive 100 at a time instead of all at once
+with ExecuteQuery('users.db', query, params, stream=True, batch_size=100) as rows:
+    total_age = sum(row[3] for row in rows)
+print(total_age)
+
+# Or work a batch at a time, e.g. to write them somewhere else in chunks
+with ExecuteQuery('users.db', query, params, stream=True, batch_size=100) as rows:
+    for batch in rows.batches():
+        print(len(batch), "rows in this batch")
+
+# Bulk insert: 10,000 rows in transactions of 2,000, into a scratch database
+# so running the example doesn't grow users.db
+conn = sqlite3.connect('bulk_demo.db')
+conn.execute("CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)")
+conn.close()
+try:
+    with BulkWriter('bulk_demo.db', "INSERT INTO users (name, email, age) VALUES (?, ?, ?)", chunk_size=2000,
+                    checkpoint_after=5000) as writer:
+        for i in range(10000):
+            writer.append((f"bulk{i}", f"bulk{i}@example.com", 18 + i % 60))
+    print(f"{writer.rows_written} rows in {writer.elapsed:.3f}s ({writer.rows_per_second:,.0f} rows/s)")
+finally:
+    os.remove('bulk_demo.db')
+
 How it works:
 
 __init__ stores the database file, query, and parameters.
@@ -43,3 +162,7 @@ __enter__ opens the connection, executes the query, fetches results, and returns
 __exit__ ensures the connection is closed, even if an exception occurs.
 
 The context manager is reusable for any query with parameters, not just this example.
+
+With stream=True, __enter__ still runs the query but fetches nothing. It returns a QueryStream: iterating it yields rows, pulled batch_size at a time with fetchmany, and .batches() yields the batches (lists of at most batch_size rows) themselves. Memory use is bounded by batch_size instead of the size of the result. The cursor and connection are released in __exit__, so the stream must be used inside the with block.
+
+BulkWriter(db_file, sql, chunk_size) is the write-side counterpart. writer.append(row) (or writer.extend(rows)) buffers rows, and every chunk_size rows the buffer is written with executemany in its own transaction. One transaction per chunk keeps the commit cost low without holding the write lock for the whole load. __exit__ writes the last partial chunk. If the with block raises, the chunk in progress is rolled back and dropped, while chunks already flushed stay committed, so a failed load can be resumed from writer.rows_written. Afterwards writer.rows_written, writer.elapsed and writer.rows_per_second report the throughput. With checkpoint_after=N, a load of at least N rows ends with PRAGMA wal_checkpoint(TRUNCATE) (on a WAL database), which copies the load into the main database file and empties the WAL at the end of the load instead of leaving that work to whichever commit comes next. The example loads a scratch bulk_demo.db and deletes it afterwards, so running it leaves users.db unchanged.
@@ -1,37 +1,428 @@
 I'm going to run multiple SQLite queries concurrently, we can use aiosqlite and asyncio.gather. Here’s a complete example:
+import time
+import heapq
 import asyncio
+import itertools
 import aiosqlite
+from collections import deque
+from dataclasses import dataclass, field
+
+# Async connection pool: at most `size` aiosqlite connections (each one is a
+# background thread), shared by every query. Callers beyond that wait on a
+# semaphore, and how long they waited is recorded.
+class AsyncConnectionPool:
+    def __init__(self, db_file, size=8):
+        self.db_file = db_file
+        self.size = size
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+        self._waits = deque(maxlen=10000)  # recent queue wait times, seconds
+        self.timeouts = 0
+        self.cancelled = 0
+        self._closing = set()
+
+    async def acquire(self):
+        start = time.perf_counter()
+        await self._slots.acquire()
+        self._waits.append(time.perf_counter() - start)
+        if self._idle:
+            return self._idle.pop()
+        try:
+            return await aiosqlite.connect(self.db_file)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        self._idle.append(conn)
+        self._slots.release()
+
+    def discard(self, conn):
+        # The connection's state is unknown (cleanup was cancelled or failed):
+        # close it in the background and free its slot for a fresh one
+        task = asyncio.get_running_loop().create_task(conn.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+        self._slots.release()
+
+    async def query(self, sql, params=(), timeout=None):
+        conn = await self.acquire()
+        interrupted = False
+        try:
+            return await asyncio.wait_for(conn.execute_fetchall(sql, params), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            interrupted = True
+            raise
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            interrupted = True
+            raise
+        finally:
+            if interrupted:
+                # Stop the statement still running in the connection's thread,
+                # so the next user of this connection isn't stuck behind it
+                await conn.interrupt()
+            self.release(conn)
+
+    def stats(self):
+        waits = sorted(self._waits)
+
+        def pct(p):
+            return waits[min(len(waits) - 1, int(len(waits) * p))] * 1000 if waits else 0.0
+        return {
+            "queries": len(waits),
+            "wait_p50_ms": pct(0.50),
+            "wait_p95_ms": pct(0.95),
+            "wait_max_ms": waits[-1] * 1000 if waits else 0.0,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+        }
+
+    async def close(self):
+        while self._idle:
+            await self._idle.pop().close()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+# Give a connection back clean: close the cursor, roll back anything left
+# open. If that is interrupted (e.g. the task is cancelled mid-cleanup) the
+# connection is dropped instead of going back to the pool half-reset
+async def _release(pool, conn, cursor=None):
+    try:
+        if cursor is not None:
+            await cursor.close()
+        if conn.in_transaction:
+            await conn.rollback()
+    except BaseException:
+        pool.discard(conn)
+        raise
+    pool.release(conn)
+
+# async with counterpart of DatabaseConnection (0-databaseconnection.py),
+# borrowing a connection from the pool instead of opening one
+class AsyncDatabaseConnection:
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn = None
+
+    async def __aenter__(self):
+        self.conn = await self.pool.acquire()
+        return self.conn
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        conn, self.conn = self.conn, None
+        if conn is not None:
+            await _release(self.pool, conn)
+        return False
+
+# async with / async for counterpart of ExecuteQuery (1-execute.py) with
+# stream=True: rows are fetched batch_size at a time on a pooled connection
+class AsyncExecuteQuery:
+    def __init__(self, pool, query, params=None, batch_size=500):
+        self.pool = pool
+        self.query = query
+        self.params = params or ()
+        self.batch_size = batch_size
+        self.conn = None
+        self.cursor = None
+
+    async def __aenter__(self):
+        self.conn = await self.pool.acquire()
+        try:
+            self.cursor = await self.conn.execute(self.query, self.params)
+        except BaseException:
+            # __aexit__ doesn't run if __aenter__ raises
+            conn, self.conn = self.conn, None
+            await _release(self.pool, conn)
+            raise
+        return self
+
+    async def batches(self):
+        while True:
+            batch = await self.cursor.fetchmany(self.batch_size)
+            if not batch:
+                return
+            yield batch
+            if len(batch) < self.batch_size:
+                return
+
+    async def __aiter__(self):
+        async for batch in self.batches():
+            for row in batch:
+                yield row
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        conn, self.conn = self.conn, None
+        if conn is not None:
+            if exc_type is not None:
+                # e.g. cancelled mid-fetch: stop the statement so cleanup
+                # doesn't queue behind the rest of the batch
+                await conn.interrupt()
+            await _release(self.pool, conn, self.cursor)
+        self.cursor = None
+        return False
+
+# Like asyncio.Semaphore, but when a slot frees up it goes to the waiter with
+# the lowest priority number (then first come, first served)
+class PrioritySemaphore:
+    def __init__(self, value):
+        self._value = value
+        self._waiters = []
+        self._order = itertools.count()
+
+    async def acquire(self, priority):
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # we were handed a slot just as we got cancelled: pass it on
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._value += 1
+
+@dataclass
+class Query:
+    name: str
+    sql: str
+    params: tuple = ()
+    priority: int = 10     # lower runs first
+    timeout: float = None  # seconds, for this query alone
+
+@dataclass
+class QueryResult:
+    name: str
+    status: str            # "ok", "error", "timeout", "cancelled" or "deadline"
+    rows: list = None
+    error: str = None
+    elapsed_ms: float = 0.0
+
+@dataclass
+class QueryScheduler:
+    pool: AsyncConnectionPool
+    max_concurrency: int = None  # defaults to the pool size
+    _slots: PrioritySemaphore = field(init=False)
+
+    def __post_init__(self):
+        self._slots = PrioritySemaphore(self.max_concurrency or self.pool.size)
+
+    async def _run(self, query):
+        # The priority semaphore decides who goes next; pool.query applies the
+        # timeout and interrupts the statement if it times out or is cancelled
+        await self._slots.acquire(query.priority)
+        try:
+            return await self.pool.query(query.sql, query.params, timeout=query.timeout)
+        finally:
+            self._slots.release()
+
+    async def _result(self, query):
+        start = time.perf_counter()
+        try:
+            rows = await self._run(query)
+            return QueryResult(query.name, "ok", rows, elapsed_ms=(time.perf_counter() - start) * 1000)
+        except asyncio.TimeoutError:
+            return QueryResult(query.name, "timeout", elapsed_ms=(time.perf_counter() - start) * 1000)
+        except asyncio.CancelledError:
+            return QueryResult(query.name, "cancelled", elapsed_ms=(time.perf_counter() - start) * 1000)
+        except Exception as e:
+            return QueryResult(query.name, "error", error=repr(e), elapsed_ms=(time.perf_counter() - start) * 1000)
+
+    # tasks is a list; results come back in the same order (names may repeat)
+    async def _collect(self, tasks, deadline, stop_on_first_ok):
+        pending = set(tasks)
+        results = {}
+        loop = asyncio.get_running_loop()
+        end = loop.time() + deadline if deadline is not None else None
+        try:
+            while pending:
+                timeout = None if end is None else max(end - loop.time(), 0)
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break  # batch deadline reached
+                for task in done:
+                    results[task] = task.result()
+                if stop_on_first_ok and any(r.status == "ok" for r in results.values()):
+                    break
+        finally:
+            # Also runs when our caller is cancelled: never leave queries running
+            # (and holding slots) for a batch nobody is waiting for
+            await _cancel_all(pending)
+        for task in pending:
+            result = task.result()
+            if result.status == "cancelled" and not stop_on_first_ok:
+                result.status = "deadline"  # cancelled because the batch ran out of time
+            results[task] = result
+        return [results[task] for task in tasks]
+
+    # Run all queries; whatever is unfinished at the batch deadline is cancelled
+    async def run_all(self, queries, deadline=None):
+        tasks = [asyncio.create_task(self._result(q)) for q in queries]
+        return await self._collect(tasks, deadline, stop_on_first_ok=False)
+
+    # Run alternatives for the same answer; the first success wins, the rest are cancelled
+    async def first_wins(self, queries, deadline=None):
+        tasks = [asyncio.create_task(self._result(q)) for q in queries]
+        return await self._collect(tasks, deadline, stop_on_first_ok=True)
+
+    # Start the query; if it hasn't answered after hedge_after seconds, start a
+    # copy too and take whichever finishes first
+    async def hedged(self, query, hedge_after=0.05, copies=2, deadline=None):
+        loop = asyncio.get_running_loop()
+        end = loop.time() + deadline if deadline is not None else None
+        tasks = []
+        try:
+            for i in range(copies):
+                name = query.name if i == 0 else f"{query.name}#hedge{i}"
+                tasks.append(asyncio.create_task(self._result(Query(name, query.sql, query.params, query.priority, query.timeout))))
+                wait_for = hedge_after if end is None else min(hedge_after, max(end - loop.time(), 0))
+                done, _ = await asyncio.wait(tasks, timeout=wait_for)
+                if any(t.result().status == "ok" for t in done):
+                    break
+            remaining = None if end is None else max(end - loop.time(), 0)
+            results = await self._collect(tasks, remaining, stop_on_first_ok=True)
+        finally:
+            await _cancel_all(t for t in tasks if not t.done())
+        winner = next((r for r in results if r.status == "ok"), None)
+        return winner or results[0]
+
+async def _cancel_all(tasks):
+    tasks = list(tasks)
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        # shield: if we are being cancelled ourselves, still wait for the
+        # queries to stop before giving up
+        await asyncio.shield(asyncio.wait(tasks))
 
 # Asynchronous function to fetch all users
-async def async_fetch_users():
-    async with aiosqlite.connect("users.db") as db:
-        async with db.execute("SELECT * FROM users") as cursor:
-            results = await cursor.fetchall()
-            return results
+async def async_fetch_users(pool, timeout=None):
+    return await pool.query("SELECT * FROM users", timeout=timeout)
 
 # Asynchronous function to fetch users older than 40
-async def async_fetch_older_users():
-    async with aiosqlite.connect("users.db") as db:
-        async with db.execute("SELECT * FROM users WHERE age > ?", (40,)) as cursor:
-            results = await cursor.fetchall()
-            return results
+async def async_fetch_older_users(pool, timeout=None):
+    return await pool.query("SELECT * FROM users WHERE age > ?", (40,), timeout=timeout)
 
 # Function to run both queries concurrently
 async def fetch_concurrently():
-    all_users, older_users = await asyncio.gather(
-        async_fetch_users(),
-        async_fetch_older_users()
-    )
+    pool = AsyncConnectionPool("users.db", size=4)
+    try:
+        all_users, older_users = await asyncio.gather(
+            async_fetch_users(pool, timeout=5),
+            async_fetch_older_users(pool, timeout=5)
+        )
+    finally:
+        await pool.close()
     print("All users:", all_users)
     print("Users older than 40:", older_users)
 
 # Run the concurrent fetch
 asyncio.run(fetch_concurrently())
 
+# Same ergonomics as the sync context managers, without blocking the loop
+async def stream_older_users():
+    pool = AsyncConnectionPool("users.db", size=4)
+    try:
+        async with AsyncExecuteQuery(pool, "SELECT * FROM users WHERE age > ?", (40,), batch_size=50) as rows:
+            count = 0
+            async for row in rows:
+                count += 1
+        print("Streamed", count, "users older than 40")
+
+        async with AsyncDatabaseConnection(pool) as conn:
+            print(await conn.execute_fetchall("SELECT COUNT(*) FROM users"))
+    finally:
+        await pool.close()
+
+asyncio.run(stream_older_users())
+
+
+# Priorities, deadlines, first-wins and hedging on the same pool
+async def schedule_queries():
+    pool = AsyncConnectionPool("users.db", size=4)
+    scheduler = QueryScheduler(pool, max_concurrency=2)
+    slow = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 50000000) SELECT COUNT(*) FROM c"
+
+    # Priorities and per-query timeouts; the batch returns whatever finished in 0.5s
+    results = await scheduler.run_all([
+        Query("all_users", "SELECT * FROM users", priority=5),
+        Query("older_users", "SELECT * FROM users WHERE age > ?", (40,), priority=1),
+        Query("report", slow, priority=9, timeout=0.2),
+        Query("broken", "SELECT * FROM no_such_table"),
+    ], deadline=0.5)
+    for r in results:
+        print(f"{r.name:<12} {r.status:<9} rows={len(r.rows) if r.rows else 0:<4} {r.elapsed_ms:7.1f} ms {r.error or ''}")
+
+    # First wins: two ways to get the count, the slow one is cancelled
+    results = await scheduler.first_wins([
+        Query("scan", slow),
+        Query("count", "SELECT COUNT(*) FROM users"),
+    ], deadline=1.0)
+    print([(r.name, r.status) for r in results])
+
+    # Hedged: if the first attempt is slow, a second copy races it
+    result = await scheduler.hedged(Query("lookup", "SELECT * FROM users WHERE id = ?", (1,)), hedge_after=0.01)
+    print(result.name, result.status, result.rows)
+    await pool.close()
+
+asyncio.run(schedule_queries())
+
+# Benchmark: 2 to 1,000 concurrent queries, one connection per query
+# (unbounded) vs the pool (8 connections)
+async def naive_query(sql, params):
+    async with aiosqlite.connect("users.db") as db:
+        return await db.execute_fetchall(sql, params)
+
+async def run_benchmark(levels=(2, 10, 100, 1000)):
+    sql = "SELECT * FROM users WHERE age > ? LIMIT 20"
+    print(f"\n{'queries':>8} {'unbounded q/s':>14} {'pooled q/s':>11} {'wait p95 ms':>12}")
+    for n in levels:
+        start = time.perf_counter()
+        await asyncio.gather(*(naive_query(sql, (i % 60,)) for i in range(n)))
+        naive = n / (time.perf_counter() - start)
+
+        pool = AsyncConnectionPool("users.db", size=8)
+        start = time.perf_counter()
+        await asyncio.gather(*(pool.query(sql, (i % 60,), timeout=10) for i in range(n)))
+        pooled = n / (time.perf_counter() - start)
+        stats = pool.stats()
+        await pool.close()
+        print(f"{n:>8} {naive:>14.0f} {pooled:>11.0f} {stats['wait_p95_ms']:>12.2f}")
+
+asyncio.run(run_benchmark())
+
 How it works:
 
-async_fetch_users and async_fetch_older_users are async functions that open the database asynchronously and fetch results.
+async_fetch_users and async_fetch_older_users are async functions that run their query on a connection borrowed from a shared AsyncConnectionPool.
+
+The pool opens at most size aiosqlite connections (each has its own background thread) and reuses them. An asyncio.Semaphore bounds how many queries run at once; the others wait their turn instead of opening more connections. Every wait is recorded, and pool.stats() reports p50/p95/max queue wait plus timeout and cancellation counts.
+
+pool.query(sql, params, timeout=...) cancels the query after timeout seconds (asyncio.TimeoutError). If the query times out or the calling task is cancelled, the statement still running in the connection's thread is interrupted, so the connection goes back to the pool ready for the next query.
+
+AsyncDatabaseConnection(pool) and AsyncExecuteQuery(pool, query, params, batch_size) are the async with versions of DatabaseConnection and ExecuteQuery. AsyncDatabaseConnection hands out a pooled connection. AsyncExecuteQuery runs the query on one and supports async for row in ... (or async for batch in ....batches()), fetching batch_size rows at a time, so the loop never blocks and memory stays bounded. On exit the cursor is closed, any open transaction is rolled back and the connection goes back to the pool. If that cleanup is itself cancelled or fails, the connection is closed in the background instead of being reused in an unknown state, and its pool slot is freed.
 
 asyncio.gather runs them concurrently, so both queries can execute at the same time.
 
 asyncio.run starts the asynchronous event loop and runs the fetch_concurrently coroutine.
+
+Query describes one query: name, SQL, parameters, a priority (lower runs first) and its own timeout. Every query runs through QueryScheduler on top of the AsyncConnectionPool, which applies the timeout, interrupts timed-out or cancelled statements and records queue waits (pool.stats()). The scheduler lets at most max_concurrency (by default the pool size) run at once. When a slot frees up, a PrioritySemaphore hands it to the waiting query with the best priority.
+
+run_all(queries, deadline=...) starts everything and waits until all queries are done or the batch deadline passes. It returns one QueryResult per query with status ok, error, timeout (its own timeout hit) or deadline (cancelled because the batch ran out of time). A slow or broken query therefore never costs you the others' results.
+
+Results come back as a list in the same order as the queries, so two queries may share a name. If the caller of run_all, first_wins or hedged is itself cancelled, every query it started is cancelled (and interrupted) before the cancellation propagates, so no orphan queries keep holding slots.
+
+first_wins(queries) is for alternatives that answer the same question: the first ok result wins and the rest are cancelled (status cancelled).
+
+hedged(query, hedge_after=...) starts the query, and if no answer has come back after hedge_after seconds, starts a copy as well. Whichever returns first wins and the other is cancelled, which cuts tail latency when one attempt gets stuck.
+
+The benchmark at the bottom runs 2 to 1,000 concurrent queries with one connection each versus the pool, and prints throughput and the p95 queue wait.
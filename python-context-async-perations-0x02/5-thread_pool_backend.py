@@ -0,0 +1,161 @@
+a thread-pool backend for the concurrent queries: aiosqlite runs every call in a thread anyway, so here the same fetch_concurrently runs on a ThreadPoolExecutor over per-thread sqlite3 connections, plus a benchmark comparing aiosqlite, the thread pool and plain sequential execution. Here’s the script:
+import time
+import random
+import asyncio
+import sqlite3
+import threading
+import aiosqlite
+from concurrent.futures import ThreadPoolExecutor
+
+# Thread-pool backend: each worker thread opens one sqlite3 connection the
+# first time it runs a query and keeps it, so connections are pooled with the
+# threads and never shared between them
+class ThreadPoolBackend:
+    def __init__(self, db_file, size=8):
+        self.db_file = db_file
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="sqlite")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _execute(self, sql, params):
+        return self._connection().execute(sql, params).fetchall()
+
+    # Returns a concurrent.futures.Future with the rows
+    def submit(self, sql, params=()):
+        return self._executor.submit(self._execute, sql, params)
+
+    # Same call from async code: awaits the worker thread without blocking the loop
+    async def query(self, sql, params=()):
+        return await asyncio.wrap_future(self.submit(sql, params))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+# Same queries and same fetch_concurrently as in 3-concurrent.py, on the thread pool
+async def async_fetch_users(backend):
+    return await backend.query("SELECT * FROM users")
+
+async def async_fetch_older_users(backend):
+    return await backend.query("SELECT * FROM users WHERE age > ?", (40,))
+
+async def fetch_concurrently():
+    backend = ThreadPoolBackend("users.db", size=4)
+    try:
+        all_users, older_users = await asyncio.gather(
+            async_fetch_users(backend),
+            async_fetch_older_users(backend)
+        )
+    finally:
+        backend.close()
+    print("All users:", all_users)
+    print("Users older than 40:", older_users)
+
+asyncio.run(fetch_concurrently())
+
+
+# Benchmark: aiosqlite vs thread pool vs sequential, per query mix and concurrency
+QUERY_MIXES = {
+    "point": [("SELECT * FROM users WHERE id = ?", lambda rng: (rng.randint(1, 200),))],
+    "scan": [("SELECT * FROM users WHERE age > ?", lambda rng: (rng.randint(18, 77),))],
+    "mixed": [
+        ("SELECT * FROM users WHERE id = ?", lambda rng: (rng.randint(1, 200),)),
+        ("SELECT * FROM users WHERE id = ?", lambda rng: (rng.randint(1, 200),)),
+        ("SELECT * FROM users WHERE id = ?", lambda rng: (rng.randint(1, 200),)),
+        ("SELECT age, COUNT(*) FROM users GROUP BY age", lambda rng: ()),
+    ],
+}
+
+def make_queries(mix, n):
+    rng = random.Random(7)
+    return [(sql, params(rng)) for sql, params in (rng.choice(QUERY_MIXES[mix]) for _ in range(n))]
+
+async def timed(coro, latencies):
+    start = time.perf_counter()
+    await coro
+    latencies.append(time.perf_counter() - start)
+
+async def run_aiosqlite(queries, concurrency):
+    # As in 3-concurrent.py: `concurrency` aiosqlite connections behind a semaphore
+    idle = [await aiosqlite.connect("users.db") for _ in range(concurrency)]
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(sql, params):
+        async with slots:
+            conn = idle.pop()
+            try:
+                return await conn.execute_fetchall(sql, params)
+            finally:
+                idle.append(conn)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(one(sql, params), latencies) for sql, params in queries))
+    elapsed = time.perf_counter() - start
+    for conn in idle:
+        await conn.close()
+    return elapsed, latencies
+
+async def run_thread_pool(queries, concurrency):
+    backend = ThreadPoolBackend("users.db", size=concurrency)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(backend.query(sql, params), latencies) for sql, params in queries))
+    elapsed = time.perf_counter() - start
+    backend.close()
+    return elapsed, latencies
+
+async def run_sequential(queries, concurrency):
+    # One connection, one query after another, on the loop itself. Latency is
+    # measured from the moment all queries were submitted, like the others
+    conn = sqlite3.connect("users.db")
+    latencies = []
+    start = time.perf_counter()
+    for sql, params in queries:
+        conn.execute(sql, params).fetchall()
+        latencies.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed, latencies
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+async def run_benchmark(n=2000, levels=(1, 8, 64)):
+    backends = [("sequential", run_sequential), ("aiosqlite", run_aiosqlite), ("thread pool", run_thread_pool)]
+    print(f"\n{'mix':<6} {'conc':>4} {'backend':<12} {'q/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for mix in QUERY_MIXES:
+        queries = make_queries(mix, n)
+        for concurrency in levels:
+            for name, run in backends:
+                if name == "sequential" and concurrency != levels[0]:
+                    continue  # concurrency doesn't apply
+                elapsed, latencies = await run(queries, concurrency)
+                print(f"{mix:<6} {concurrency:>4} {name:<12} {n / elapsed:>8.0f} "
+                      f"{percentile(latencies, 0.50):>8.2f} {percentile(latencies, 0.99):>8.2f}")
+
+asyncio.run(run_benchmark())
+
+How it works:
+
+ThreadPoolBackend runs queries on a ThreadPoolExecutor with size worker threads. Each thread opens its own sqlite3 connection the first time it needs one and keeps it, so connections are pooled with the threads and never shared between them. submit(sql, params) returns a concurrent.futures.Future for use from plain threaded code. await backend.query(sql, params) is the same call for async code: asyncio.wrap_future waits for the worker without blocking the event loop.
+
+async_fetch_users, async_fetch_older_users and fetch_concurrently are the same as in 3-concurrent.py, so callers can switch backends without changing their code.
+
+Both backends end up in the same place: aiosqlite also runs each connection in its own thread. The difference is the handoff. The thread pool makes one trip to a worker per query (execute and fetchall together). aiosqlite makes a trip per call. It also keeps one thread per connection, where the thread pool has one per worker.
+
+The benchmark runs the same list of queries (point lookups, scans, and a mix of lookups and a GROUP BY) at several concurrency levels through each backend and prints throughput and p50/p99 latency. Latency is measured from submission, so it includes time spent waiting behind earlier queries. Sequential runs everything on one connection on the loop itself.
+
+Don't expect a clear winner. With the small users table every query takes microseconds. At that size the handoff to a thread and back costs more than the query, so sequential is usually several times faster than either concurrent backend. Between the two, the winner depends on the machine and the Python version. More worker threads mostly add GIL contention. Concurrency starts paying off once queries wait on disk or run long enough to overlap, because sqlite3 releases the GIL while SQLite works. Run the benchmark with your own query mix before switching backends.
@@ -0,0 +1,221 @@
+an optional batching layer for the concurrent queries: queries that arrive together and scan the same table with different WHERE clauses are answered by one shared scan, and each caller gets only its own rows. A cost check decides when merging is worth it. Here’s the script:
+import os
+import re
+import time
+import random
+import asyncio
+import sqlite3
+import aiosqlite
+from collections import Counter, defaultdict
+from collections.abc import Mapping
+
+# Only plain "SELECT <columns> FROM <table> [WHERE <predicate>]" queries are
+# merged; anything with joins, grouping, ordering, limits or subqueries runs as is
+_SCAN = re.compile(r"^\s*select\s+(?P<columns>.+?)\s+from\s+(?P<table>\w+)(?:\s+where\s+(?P<where>.+?))?\s*;?\s*$",
+                   re.IGNORECASE | re.DOTALL)
+_NOT_MERGEABLE = re.compile(r"\b(select|join|group|order|limit|having|union|distinct)\b", re.IGNORECASE)
+# The column list must be "*" or bare column names: an aggregate or any other
+# function (COUNT(*), SUM(x), x OVER (...)) would be computed over the merged
+# rows instead of each query's own rows
+_PLAIN_COLUMNS = re.compile(r"^\s*(?:\*|\w+(?:\.\w+)?(?:\s*,\s*\w+(?:\.\w+)?)*)\s*$")
+# Merging concatenates the parameters of several queries, which only works for
+# plain positional "?" placeholders
+_NAMED_PARAM = re.compile(r"[:@$]\w|\?\d")
+
+def parse_scan(sql):
+    match = _SCAN.match(sql)
+    if match is None:
+        return None
+    columns, table, where = match.group("columns", "table", "where")
+    if not _PLAIN_COLUMNS.match(columns) or (where and _NOT_MERGEABLE.search(where)):
+        return None
+    return " ".join(columns.split()).lower(), table.lower(), where
+
+class SharedScanBatcher:
+    def __init__(self, db_file, window=0.002, max_merge=16, enabled=True):
+        self.db_file = db_file
+        self.window = window          # how long to wait for other queries to merge with, seconds
+        self.max_merge = max_merge    # most queries per shared scan
+        self.enabled = enabled
+        self.stats = Counter()
+        self._conn = None
+        self._pending = []
+        self._flush_task = None
+        self._full_scan = {}          # sql -> does its plan scan the whole table
+
+    async def _connection(self):
+        if self._conn is None:
+            self._conn = await aiosqlite.connect(self.db_file)
+        return self._conn
+
+    async def _execute(self, sql, params):
+        conn = await self._connection()
+        return await conn.execute_fetchall(sql, params)
+
+    async def query(self, sql, params=()):
+        shape = parse_scan(sql) if self.enabled else None
+        if isinstance(params, Mapping) or _NAMED_PARAM.search(sql):
+            shape = None
+        if shape is None:
+            self.stats["direct"] += 1
+            return await self._execute(sql, params)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((shape, sql, tuple(params), future))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window())
+        return await future
+
+    async def _flush_after_window(self):
+        await asyncio.sleep(self.window)
+        batch, self._pending, self._flush_task = self._pending, [], None
+        groups = defaultdict(list)
+        for shape, sql, params, future in batch:
+            groups[shape[:2]].append((shape[2], sql, params, future))
+        for (columns, table), queries in groups.items():
+            await self._run_group(columns, table, queries)
+
+    # Cost heuristic: merging saves one table scan per extra query, but the
+    # merged statement always scans the whole table and returns the union of
+    # the rows. So only queries that would scan the table anyway (no usable
+    # index) are merged, at least two of them, at most max_merge per scan
+    # since every returned row is checked once per query
+    async def _is_full_scan(self, sql, params):
+        if sql not in self._full_scan:
+            conn = await self._connection()
+            plan = await conn.execute_fetchall(f"EXPLAIN QUERY PLAN {sql}", params)
+            self._full_scan[sql] = all(row[3].split()[0] == "SCAN" for row in plan)
+        return self._full_scan[sql]
+
+    async def _run_group(self, columns, table, queries):
+        mergeable, separate = [], []
+        for query in queries:
+            try:
+                full_scan = await self._is_full_scan(query[1], query[2])
+            except Exception:
+                full_scan = False  # let the query itself report the error
+            (mergeable if full_scan else separate).append(query)
+        if len(mergeable) < 2:
+            separate += mergeable
+            mergeable = []
+        for query in separate:
+            await self._run_one(query)
+        for i in range(0, len(mergeable), self.max_merge):
+            chunk = mergeable[i:i + self.max_merge]
+            if len(chunk) == 1:
+                await self._run_one(chunk[0])
+            else:
+                await self._run_merged(columns, table, chunk)
+
+    async def _run_one(self, query):
+        _, sql, params, future = query
+        self.stats["separate"] += 1
+        try:
+            rows = await self._execute(sql, params)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(rows)
+
+    async def _run_merged(self, columns, table, queries):
+        # One extra 0/1 column per query says whether the row matches its
+        # predicate. SQLite evaluates the predicates, so NULLs, collations and
+        # types behave exactly as in the original queries
+        flags = ", ".join(f"CASE WHEN ({where}) THEN 1 ELSE 0 END" if where else "1"
+                          for where, _, _, _ in queries)
+        params = [p for where, _, query_params, _ in queries if where for p in query_params]
+        sql = f"SELECT {columns}, {flags} FROM {table}"
+        if all(where for where, _, _, _ in queries):
+            sql += " WHERE " + " OR ".join(f"({where})" for where, _, _, _ in queries)
+            params += params
+        self.stats["merged_scans"] += 1
+        self.stats["merged_queries"] += len(queries)
+        try:
+            rows = await self._execute(sql, params)
+        except Exception:
+            for query in queries:  # something in one predicate broke the merge: fall back
+                await self._run_one(query)
+            return
+        n = len(queries)
+        results = [[] for _ in queries]
+        for row in rows:
+            data = row[:-n]
+            for i, flag in enumerate(row[-n:]):
+                if flag:
+                    results[i].append(data)
+        for (_, _, _, future), result in zip(queries, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self):
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+# Same fetch_concurrently as 3-concurrent.py: both queries scan users, so they share one scan
+async def fetch_concurrently():
+    batcher = SharedScanBatcher("users.db")
+    try:
+        all_users, older_users = await asyncio.gather(
+            batcher.query("SELECT * FROM users"),
+            batcher.query("SELECT * FROM users WHERE age > ?", (40,))
+        )
+    finally:
+        await batcher.close()
+    print("All users:", len(all_users), "Users older than 40:", len(older_users))
+    print(dict(batcher.stats))
+
+asyncio.run(fetch_concurrently())
+
+
+# Benchmark: n concurrent range queries on an unindexed column, separate vs merged
+BENCH_DB = "shared_scan_bench.db"
+
+def seed(rows=200000):
+    conn = sqlite3.connect(BENCH_DB)
+    conn.execute("DROP TABLE IF EXISTS events")
+    conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, user_id INTEGER, kind TEXT, amount REAL)")
+    rng = random.Random(3)
+    conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?)",
+                     ((i, rng.randint(1, 5000), rng.choice("abcdefgh"), rng.random() * 100) for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+async def run_benchmark(levels=(1, 2, 4, 8, 16)):
+    seed()
+    print(f"\n{'queries':>8} {'separate ms':>12} {'merged ms':>10} {'speedup':>8}")
+    for n in levels:
+        queries = [("SELECT * FROM events WHERE kind = ? AND amount > ?", ("abcdefgh"[i % 8], 90 + i % 10))
+                   for i in range(n)]
+        timings = []
+        for enabled in (False, True):
+            batcher = SharedScanBatcher(BENCH_DB, enabled=enabled)
+            await batcher.query("SELECT 1")  # open the connection outside the timing
+            best = float("inf")
+            for _ in range(3):
+                start = time.perf_counter()
+                await asyncio.gather(*(batcher.query(sql, params) for sql, params in queries))
+                best = min(best, time.perf_counter() - start)
+            timings.append(best * 1000)
+            await batcher.close()
+        print(f"{n:>8} {timings[0]:>12.1f} {timings[1]:>10.1f} {timings[0] / timings[1]:>7.2f}x")
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(BENCH_DB + suffix):
+            os.remove(BENCH_DB + suffix)
+
+asyncio.run(run_benchmark())
+
+How it works:
+
+SharedScanBatcher(db_file, window=0.002) sits in front of an aiosqlite connection. batcher.query(sql, params) returns the same rows as running the query directly.
+
+Queries of the form SELECT <columns> FROM <table> [WHERE <predicate>] are held for window seconds. Only * or a list of bare column names is merged. A column list with an aggregate or any other function call (COUNT(*), SUM(age), a window function) runs directly, because in the merged statement it would be computed over the rows of all the queries together. Anything with joins, grouping, ordering, LIMIT or subqueries runs directly too, and so does any query with named or numbered placeholders (:name, @name, $name, ?1) or dict parameters, because merging concatenates the positional parameters of the queries. When the window closes, the held queries are grouped by table and column list. Queries in a group that would scan the whole table anyway are merged into one statement:
+
+SELECT <columns>, CASE WHEN (p1) THEN 1 ELSE 0 END, CASE WHEN (p2) THEN 1 ELSE 0 END FROM t WHERE (p1) OR (p2)
+
+SQLite reads the table once and tags each returned row with which predicates it matched. The batcher strips the tags and gives each caller the rows tagged for it. SQLite still evaluates every predicate, so NULL handling, collations and type conversions match the original queries. If any query has no WHERE clause, the OR filter is dropped and the whole table is returned once.
+
+The cost heuristic: a merged statement always scans the whole table and returns the union of all matches, so it only wins when the separate queries would each scan the table too. EXPLAIN QUERY PLAN (cached per SQL) decides this. Queries that can use an index (SEARCH in the plan) run on their own, because merging would turn a cheap lookup into a full scan. Merging needs at least two scanning queries. At most max_merge queries share one scan, because every returned row is checked once per query in Python. If the merged statement fails, each query runs on its own so the error reaches the right caller.
+
+enabled=False turns the layer off (every query runs directly), and batcher.stats counts direct, separate and merged queries. The benchmark runs 1 to 16 concurrent filters on an unindexed 200k-row table with the layer off and on, then deletes shared_scan_bench.db. Don't expect n times faster. The merged statement still evaluates every predicate on every row, so when the table is already in the page cache it only saves the repeated walk over the rows. Expect about 1.3-1.5x at 8-16 queries, and nothing (or a small loss to the window wait) at 1-2. The saving is larger when reading the table is the expensive part: tables bigger than the cache, or cold disks.
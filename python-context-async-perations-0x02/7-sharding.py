@@ -0,0 +1,179 @@
+a sharding layer for when one users.db is no longer enough: keys are hashed to one of N SQLite files, single-key queries go to one shard, and queries over all users run on every shard in parallel and are merged (with ORDER BY/LIMIT merge-sort). Here’s the script, with a scaling benchmark at the end:
+import os
+import time
+import zlib
+import heapq
+import random
+import asyncio
+import sqlite3
+import aiosqlite
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# Same context manager as in 1-execute.py
+class ExecuteQuery:
+    def __init__(self, db_file, query, params=None):
+        self.db_file = db_file
+        self.query = query
+        self.params = params or ()
+        self.conn = None
+        self.results = None
+
+    def __enter__(self):
+        self.conn = sqlite3.connect(self.db_file)
+        try:
+            self.results = self.conn.execute(self.query, self.params).fetchall()
+        except BaseException:
+            self.conn.close()
+            raise
+        return self.results
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.conn:
+            self.conn.close()
+        return False
+
+# Top level so a ProcessPoolExecutor can pickle it
+def _query_shard(db_file, sql, params):
+    with ExecuteQuery(db_file, sql, params) as rows:
+        return rows
+
+class ShardedDatabase:
+    def __init__(self, base, shards, executor="thread"):
+        # users.db with 4 shards -> users.0.db ... users.3.db
+        root, ext = os.path.splitext(base)
+        self.paths = [f"{root}.{i}{ext}" for i in range(shards)]
+        pool = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        self._executor = pool(max_workers=shards)
+
+    # crc32 rather than hash(): the same key must map to the same shard in every process and every run
+    def shard_for(self, key):
+        return zlib.crc32(str(key).encode()) % len(self.paths)
+
+    def path_for(self, key):
+        return self.paths[self.shard_for(key)]
+
+    # Single-key query: runs on the one shard that holds the key
+    def query_key(self, key, sql, params=()):
+        with ExecuteQuery(self.path_for(key), sql, params) as rows:
+            return rows
+
+    # Run sql on every shard in parallel and merge. Without key the rows are
+    # concatenated. With key, each shard's result must already be sorted by it
+    # (ORDER BY in sql): they are merge-sorted, and limit keeps the first rows
+    def scatter(self, sql, params=(), key=None, reverse=False, limit=None):
+        futures = [self._executor.submit(_query_shard, path, sql, params) for path in self.paths]
+        return _merge([f.result() for f in futures], key, reverse, limit)
+
+    # Same thing from async code, one aiosqlite connection per shard
+    async def ascatter(self, sql, params=(), key=None, reverse=False, limit=None):
+        async def one(path):
+            async with aiosqlite.connect(path) as db:
+                return await db.execute_fetchall(sql, params)
+        return _merge(await asyncio.gather(*(one(path) for path in self.paths)), key, reverse, limit)
+
+    # Writes go to the shard of each row's key
+    def insert_many(self, sql, rows, key):
+        by_shard = {}
+        for row in rows:
+            by_shard.setdefault(self.shard_for(key(row)), []).append(row)
+        for shard, shard_rows in by_shard.items():
+            conn = sqlite3.connect(self.paths[shard])
+            try:
+                with conn:
+                    conn.executemany(sql, shard_rows)
+            finally:
+                conn.close()
+
+    def run_on_all(self, sql):
+        for path in self.paths:
+            conn = sqlite3.connect(path)
+            try:
+                conn.execute(sql)
+                conn.commit()
+            finally:
+                conn.close()
+
+    def close(self):
+        self._executor.shutdown()
+
+def _merge(results, key, reverse, limit):
+    if key is None:
+        merged = (row for rows in results for row in rows)
+    else:
+        merged = heapq.merge(*results, key=key, reverse=reverse)
+    return list(islice(merged, limit))
+
+# Copy the users table of source into `shards` new shard files, keyed by user
+# id. The shard files are named after target (default: source itself)
+def split_users(source, shards, target=None):
+    db = ShardedDatabase(target or source, shards)
+    for path in db.paths:
+        if os.path.exists(path):
+            os.remove(path)
+    db.run_on_all("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)")
+    with ExecuteQuery(source, "SELECT id, name, email, age FROM users") as rows:
+        db.insert_many("INSERT INTO users VALUES (?, ?, ?, ?)", rows, key=lambda row: row[0])
+    return db
+
+# The example shards into scratch files (shard_demo.0.db ...) and deletes them afterwards
+db = split_users("users.db", 4, target="shard_demo.db")
+try:
+    print(db.query_key(42, "SELECT * FROM users WHERE id = ?", (42,)))
+    oldest = db.scatter("SELECT * FROM users WHERE age > ? ORDER BY age DESC LIMIT 5", (40,),
+                        key=lambda row: row[3], reverse=True, limit=5)
+    print("Oldest:", oldest)
+    print("Users older than 40:", len(db.scatter("SELECT * FROM users WHERE age > ?", (40,))))
+    print("Async:", len(asyncio.run(db.ascatter("SELECT * FROM users WHERE age > ?", (40,)))))
+finally:
+    db.close()
+    for path in db.paths:
+        os.remove(path)
+
+
+# Benchmark: the same data in 1, 2, 4 and 8 shards
+def run_benchmark(rows=400000, levels=(1, 2, 4, 8), repeat=5):
+    rng = random.Random(5)
+    data = [(i, f"user{i}", f"user{i}@example.com", rng.randint(18, 90)) for i in range(1, rows + 1)]
+    print(f"\n{'shards':>6} {'scatter ms':>11} {'top-100 ms':>11} {'point µs':>9}")
+    for shards in levels:
+        db = ShardedDatabase("shard_bench.db", shards)
+        for path in db.paths:
+            if os.path.exists(path):
+                os.remove(path)
+        db.run_on_all("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)")
+        db.insert_many("INSERT INTO users VALUES (?, ?, ?, ?)", data, key=lambda row: row[0])
+
+        timings = []
+        for sql, options in (
+            ("SELECT COUNT(*), AVG(age) FROM users WHERE name LIKE ?", {}),
+            ("SELECT * FROM users WHERE email LIKE ? ORDER BY age DESC LIMIT 100", {"key": lambda r: r[3], "reverse": True, "limit": 100}),
+        ):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                db.scatter(sql, ("%7%",), **options)
+            timings.append((time.perf_counter() - start) / repeat * 1000)
+
+        start = time.perf_counter()
+        for i in range(1000):
+            key = rng.randint(1, rows)
+            db.query_key(key, "SELECT * FROM users WHERE id = ?", (key,))
+        point_us = (time.perf_counter() - start) / 1000 * 1e6
+        print(f"{shards:>6} {timings[0]:>11.1f} {timings[1]:>11.1f} {point_us:>9.0f}")
+        db.close()
+        for path in db.paths:
+            os.remove(path)
+
+run_benchmark()
+
+How it works:
+
+ShardedDatabase("users.db", 4) stands for the files users.0.db to users.3.db. shard_for(key) hashes the key with crc32 and takes it modulo the shard count. crc32 gives the same answer in every process and every run, unlike Python's hash(), which is randomized per process. Changing the number of shards moves most keys, so re-split the data (as split_users does) when you do. split_users(source, shards, target=...) names the shard files after target; the example splits users.db into scratch files shard_demo.0.db to shard_demo.3.db and deletes them at the end, so nothing is left next to users.db.
+
+query_key(key, sql, params) runs a query that concerns one key (for example, WHERE id = ?) on the one shard that holds that key, through the same ExecuteQuery as 1-execute.py.
+
+scatter(sql, params) runs the query on every shard at once on a thread pool (executor="process" uses a process pool instead) and concatenates the rows. For top-N queries, pass key and reverse to match the ORDER BY in the SQL, plus limit. Each shard returns its own sorted top N, and heapq.merge merge-sorts them, taking only the first limit rows. ascatter does the same from async code, with one aiosqlite connection per shard. Aggregates come back as one row per shard (for example, one COUNT per shard), and you combine them yourself.
+
+insert_many(sql, rows, key) groups rows by shard and writes each group in one transaction.
+
+The benchmark loads the same 400k users into 1, 2, 4 and 8 shards. For each it times a scatter aggregate, a scatter top-100 with merge, and single-key lookups. Scatter queries use one thread per shard. sqlite3 releases the GIL while SQLite runs, so on a machine with several cores the scatter times should fall as shards are added, up to the core count. On a single core they stay flat or get slightly worse, since there is nothing to run in parallel. Single-key lookups stay flat whatever the shard count, because they only ever touch one shard.
@@ -1,15 +1,259 @@
 a simple decorator that logs the SQL query before executing it. Here’s a clean implementation:
 import sqlite3
+import asyncio
+import aiosqlite
 import functools
+import inspect
+import json
+import time
+import random
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import re
+import math
+import threading
+from array import array
+
+# Formats each query record as one JSON line
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "function": getattr(record, "function", None),
+            "sql": getattr(record, "sql", None),
+            "duration_ms": getattr(record, "duration_ms", None),
+            "rows": getattr(record, "rows", None),
+            "slow": getattr(record, "slow", False),
+        }
+        error = getattr(record, "error", None)
+        if error:
+            entry["error"] = error
+        return json.dumps(entry)
+
+# The decorated function only puts records on a queue; a background
+# QueueListener thread does the formatting and the (slow) write to stdout.
+query_logger = logging.getLogger("query_log")
+query_logger.setLevel(logging.INFO)
+query_logger.propagate = False
+_log_queue = queue.SimpleQueue()
+query_logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.setFormatter(JsonFormatter())
+_log_listener = logging.handlers.QueueListener(_log_queue, _stdout_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)  # flushes whatever is still queued
+
+# Only strings that start like a statement count as SQL when guessing, so an
+# email or a name passed as the first argument never ends up in the log
+_LOOKS_LIKE_SQL = re.compile(r"^\s*(select|insert|update|delete|replace|with|create|drop|alter|pragma|begin|commit|rollback|savepoint|release|explain|vacuum|analyze|attach|detach)\b", re.IGNORECASE)
+
+# Returns a function that pulls the SQL text out of a call's arguments,
+# whether it was passed as query=..., sql=... or positionally.
+def _sql_extractor(func):
+    try:
+        params = list(inspect.signature(func).parameters)
+    except (TypeError, ValueError):
+        params = []
+    for name in ("query", "sql"):
+        if name in params:
+            index = params.index(name)
+
+            def extract(args, kwargs, name=name, index=index):
+                if name in kwargs:
+                    return kwargs[name]
+                return args[index] if len(args) > index else None
+            return extract
+
+    def extract(args, kwargs):
+        for value in (*args, *kwargs.values()):
+            if isinstance(value, str) and _LOOKS_LIKE_SQL.match(value):
+                return value
+        return None
+    return extract
+
+# Normalizes SQL into a fingerprint so queries that differ only in literals
+# are grouped together: "WHERE id IN (1, 2, 3) AND name = 'x'" and
+# "WHERE id IN (7) AND name = 'y'" both become "where id in (?+) and name = ?".
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def fingerprint(sql):
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _WHITESPACE.sub(" ", sql).strip().lower()
+    return _IN_LIST.sub("in (?+)", sql)
+
+# Latency histogram with a fixed number of log-spaced buckets (1 µs to ~17 min,
+# about 4% relative error), so memory does not grow with the number of calls.
+class LatencyHistogram:
+    MIN_MS = 0.001
+    GROWTH = 1.08
+    _LOG_GROWTH = math.log(GROWTH)
+    BUCKETS = int(math.log(1e6 / MIN_MS) / _LOG_GROWTH) + 2
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * self.BUCKETS))
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms):
+        if ms < self.MIN_MS:
+            index = 0
+        else:
+            index = min(int(math.log(ms / self.MIN_MS) / self._LOG_GROWTH) + 1, self.BUCKETS - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                # upper bound of the bucket, never above the slowest call seen
+                return min(self.MIN_MS * self.GROWTH ** index, self.max_ms)
+        return self.max_ms
+
+# Aggregates latency per query fingerprint
+class QueryProfiler:
+    def __init__(self, max_fingerprints=1000):
+        self.max_fingerprints = max_fingerprints
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, sql, duration_ms):
+        key = fingerprint(sql) if sql else "<unknown>"
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                if len(self.histograms) >= self.max_fingerprints:
+                    key = "<other>"  # keeps memory bounded with unbounded query shapes
+                    histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = LatencyHistogram()
+            histogram.record(duration_ms)
+
+    def top(self, n=10, sort_by="total_ms"):
+        with self._lock:
+            rows = [
+                {
+                    "fingerprint": key,
+                    "count": h.count,
+                    "total_ms": h.total_ms,
+                    "mean_ms": h.total_ms / h.count,
+                    "p50_ms": h.percentile(50),
+                    "p95_ms": h.percentile(95),
+                    "p99_ms": h.percentile(99),
+                    "max_ms": h.max_ms,
+                }
+                for key, h in self.histograms.items()
+            ]
+        rows.sort(key=lambda row: row[sort_by], reverse=True)
+        return rows[:n]
+
+    def report(self, n=10, sort_by="total_ms", file=None):
+        lines = [f"{'count':>8} {'total ms':>10} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}  fingerprint"]
+        for row in self.top(n, sort_by):
+            lines.append(
+                f"{row['count']:>8} {row['total_ms']:>10.2f} {row['mean_ms']:>8.3f} "
+                f"{row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f} {row['p99_ms']:>8.3f}  {row['fingerprint'][:80]}"
+            )
+        text = "\n".join(lines)
+        print(f"[PROFILE] Top {n} query fingerprints by {sort_by}:\n{text}", file=file or sys.stderr)
+        return text
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+
+query_profiler = QueryProfiler()
+_report_at_exit = []
+
+def _dump_profiles():
+    for profiler in _report_at_exit:
+        if profiler.histograms:
+            profiler.report()
+
+atexit.register(_dump_profiles)
+
+def _row_count(result):
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    rowcount = getattr(result, "rowcount", None)  # cursors returned by write helpers
+    return rowcount if isinstance(rowcount, int) and rowcount >= 0 else None
 
 # Decorator to log SQL queries
-def log_queries(func):
+def log_queries(func=None, *, sample_rate=1.0, slow_ms=None, logger=query_logger,
+                profile=False, profiler=query_profiler, report_at_exit=True):
+    if func is None:
+        return lambda f: log_queries(
+            f, sample_rate=sample_rate, slow_ms=slow_ms, logger=logger,
+            profile=profile, profiler=profiler, report_at_exit=report_at_exit,
+        )
+
+    extract_sql = _sql_extractor(func)
+    name = func.__qualname__
+    if profile and report_at_exit and profiler not in _report_at_exit:
+        _report_at_exit.append(profiler)
+
+    def record_failure(args, kwargs, start, e):
+        # Failures are always logged, whatever the sample rate
+        duration_ms = (time.perf_counter() - start) * 1000
+        logger.error("query failed", extra={
+            "function": name, "sql": extract_sql(args, kwargs),
+            "duration_ms": round(duration_ms, 3), "rows": None,
+            "slow": False, "error": repr(e),
+        })
+
+    def record_success(args, kwargs, start, result):
+        duration_ms = (time.perf_counter() - start) * 1000
+        if profile:
+            # every call counts towards the profile, independent of sampling
+            profiler.record(extract_sql(args, kwargs), duration_ms)
+        slow = slow_ms is not None and duration_ms >= slow_ms
+        if slow or sample_rate >= 1.0 or random.random() < sample_rate:
+            logger.log(logging.WARNING if slow else logging.INFO, "query", extra={
+                "function": name, "sql": extract_sql(args, kwargs),
+                "duration_ms": round(duration_ms, 3), "rows": _row_count(result),
+                "slow": slow,
+            })
+
+    if inspect.iscoroutinefunction(func):
+        # Time the awaited query, not just the creation of the coroutine
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                record_failure(args, kwargs, start, e)
+                raise
+            record_success(args, kwargs, start, result)
+            return result
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        query = kwargs.get('query', None)
-        if query:
-            print(f"[LOG] Executing SQL query: {query}")
-        return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            record_failure(args, kwargs, start, e)
+            raise
+        record_success(args, kwargs, start, result)
+        return result
     return wrapper
 
 # Example usage
@@ -26,14 +270,49 @@ def fetch_all_users(query):
 users = fetch_all_users(query="SELECT * FROM users")
 print(users)
 
+# Sampled logging: roughly 1 in 10 calls is logged, but anything over 50 ms always is
+@log_queries(sample_rate=0.1, slow_ms=50)
+def fetch_users_older_than(conn, sql, age):
+    return conn.execute(sql, (age,)).fetchall()
+
+conn = sqlite3.connect('users.db')
+for age in range(20, 60):
+    fetch_users_older_than(conn, "SELECT * FROM users WHERE age > ?", age)
+
+# Profiling: aggregate latency per query shape; a top-N report is printed at exit
+@log_queries(sample_rate=0, profile=True)
+def run_query(conn, sql):
+    return conn.execute(sql).fetchall()
+
+for user_id in range(1, 200):
+    run_query(conn, f"SELECT * FROM users WHERE id = {user_id}")
+    run_query(conn, f"SELECT * FROM users WHERE id IN ({user_id}, {user_id + 1}, {user_id + 2})")
+    run_query(conn, f"SELECT * FROM users WHERE name = 'user{user_id}'")
+conn.close()
+query_profiler.report(n=5)  # or on demand at any time
+
+# Coroutines work too: the record is written once the query has been awaited
+@log_queries(slow_ms=50)
+async def fetch_all_users_async(query):
+    async with aiosqlite.connect('users.db') as db:
+        return await db.execute_fetchall(query)
+
+asyncio.run(fetch_all_users_async(query="SELECT * FROM users WHERE age > 60"))
+
 How it works:
 
-log_queries checks if the query argument exists and prints it before calling the decorated function.
+log_queries finds the SQL however it is passed: as query=... or sql=..., positionally in the query/sql parameter, or else the first string argument that starts with an SQL keyword (SELECT, INSERT, WITH, PRAGMA and so on). Other strings, such as an email passed to a lookup function, are never logged as SQL; if nothing qualifies, sql is null.
+
+It times the call and counts rows in the result (len of a list, or cursor.rowcount for writes), then emits one structured record: function, sql, duration_ms, rows and a slow flag.
 
-The original function executes the query normally.
+Records go through a QueueHandler, so the decorated call only pays for a queue put. A QueueListener thread formats them as JSON lines and writes them to stdout, and is flushed at exit.
 
-The decorator is lightweight and doesn’t modify the function’s behavior.
+sample_rate controls how many successful calls are logged. Calls slower than slow_ms are always logged (at WARNING level), and so are failures.
 
+With profile=True every call (sampled or not) is also recorded in a QueryProfiler. The SQL is normalized into a fingerprint: string and number literals become ?, IN lists collapse to in (?+), and whitespace and case are normalized. Each fingerprint keeps its count, total time and a fixed-size log-bucket histogram, so p50/p95/p99 cost the same memory after ten calls or ten million. The number of fingerprints is capped too (extra shapes are grouped under <other>).
 
+query_profiler.report(n) prints the top-N fingerprints by total time (or top(n, sort_by="p99_ms") returns them as dicts). Profilers used with report_at_exit=True also dump their report when the process exits.
 
+On an async def function, log_queries returns an async wrapper that awaits the call, so the duration covers the query itself and the rows come from the awaited result. Sampling, slow_ms and profiling work the same way.
 
+The decorator works bare (@log_queries) or with options (@log_queries(sample_rate=0.1, slow_ms=50)) and doesn’t modify the function’s behavior.
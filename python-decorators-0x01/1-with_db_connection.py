@@ -1,12 +1,383 @@
 a decorator that automatically opens a database connection, passes it to the function, and then closes it afterward. Here’s a proper implementation:
+import os
+import time
+import queue
+import random
 import sqlite3
+import asyncio
+import inspect
+import weakref
+import aiosqlite
 import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Named PRAGMA sets applied when a connection is opened. See
+# 10-connection_profiles.py for the benchmarks behind these numbers.
+CONNECTION_PROFILES = {
+    # Many concurrent readers: WAL so readers don't block on the writer,
+    # a big page cache and mmap so hot pages are read without syscalls.
+    "read_heavy": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,  # negative = KiB, so 64 MiB
+    },
+    # Many small transactions: WAL appends instead of rewriting pages, and
+    # synchronous=NORMAL only fsyncs at checkpoints (still safe against app crashes).
+    "write_heavy": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -16 * 1024,
+    },
+    # One-off imports into a file you can recreate: no fsyncs and an in-memory
+    # rollback journal. A power loss mid-load can corrupt the database.
+    "bulk_load": {
+        "journal_mode": "MEMORY",
+        "synchronous": "OFF",
+        "mmap_size": 0,
+        "cache_size": -256 * 1024,
+    },
+}
+
+def apply_profile(conn, profile, read_only=False):
+    if profile is None:
+        return conn
+    for pragma, value in CONNECTION_PROFILES[profile].items():
+        if read_only and pragma == "journal_mode":
+            continue  # persistent file setting: can't be changed from a mode=ro connection
+        conn.execute(f"PRAGMA {pragma}={value}")
+    return conn
+
+# Pool of read-only connections (mode=ro) to a WAL-mode database.
+# In WAL mode readers never block the writer and the writer never blocks readers.
+class ReadPool:
+    def __init__(self, db_file, size=8, timeout=5.0, profile="read_heavy"):
+        self.db_file = db_file
+        self.size = size
+        self.timeout = timeout
+        self.profile = profile
+        self._uri = f"file:{os.path.abspath(db_file)}?mode=ro"
+        self._idle = queue.LifoQueue()  # most recently used first: warm page cache
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                conn = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+                return apply_profile(conn, self.profile, read_only=True)
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"no read connection for {self.db_file} within {self.timeout}s") from None
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    # Closes the idle connections; call once nobody is using the pool
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+# One thread owns the only read-write connection and runs writes one at a time.
+# The queue is bounded so a write storm applies backpressure instead of piling up.
+class WriteQueue:
+    def __init__(self, db_file, max_pending=1000, profile="write_heavy"):
+        self.db_file = db_file
+        self.profile = profile
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._ready = threading.Event()
+        self._startup_error = None
+        self._thread = threading.Thread(target=self._run, name=f"db-writer:{db_file}", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._startup_error is not None:
+            # e.g. the file can't be opened: fail the first writer instead of hanging it
+            raise self._startup_error
+
+    def submit(self, func, args, kwargs):
+        if threading.current_thread() is self._thread:
+            return func(self._conn, *args, **kwargs)  # write issued from inside a write
+        future = Future()
+        self._queue.put((func, args, kwargs, future))  # blocks while the queue is full
+        return future.result()
+
+    def _run(self):
+        try:
+            self._conn = sqlite3.connect(self.db_file)
+            apply_profile(self._conn, self.profile)
+            self._conn.execute("PRAGMA journal_mode=WAL")  # persistent; lets mode=ro readers run alongside
+        except BaseException as e:
+            self._startup_error = e
+            return
+        finally:
+            self._ready.set()
+        while True:
+            item = self._queue.get()
+            if item is None:  # close()
+                self._conn.close()
+                return
+            func, args, kwargs, future = item
+            try:
+                result = func(self._conn, *args, **kwargs)
+                self._conn.commit()
+            except BaseException as e:
+                self._conn.rollback()
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    # Runs the writes already queued, then closes the connection
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+_read_pools = {}
+_write_queues = {}
+_registry_lock = threading.Lock()
+_creation_locks = {}  # one per registry key, so a slow or failing start only holds up that key
+
+def _get_or_create(registry, key, create):
+    with _registry_lock:
+        if key in registry:
+            return registry[key]
+        lock = _creation_locks.setdefault(key, threading.Lock())
+    with lock:
+        if key not in registry:
+            registry[key] = create()  # if this raises nothing is registered and the next call retries
+        return registry[key]
+
+def get_read_pool(db_file, size=8, profile=None):
+    profile = profile or "read_heavy"
+    return _get_or_create(_read_pools, (db_file, profile), lambda: ReadPool(db_file, size, profile=profile))
+
+def get_write_queue(db_file, profile=None):
+    writer = _get_or_create(_write_queues, db_file, lambda: WriteQueue(db_file, profile=profile or "write_heavy"))
+    if profile is not None and profile != writer.profile:
+        # There is only one writer per file, so it can't have two profiles
+        raise ValueError(f"writer for {db_file} already uses profile {writer.profile!r}, not {profile!r}")
+    return writer
+
+# Close and forget the read pools and the writer for db_file, e.g. before
+# deleting it; the next call opens new ones
+def close_pools(db_file):
+    with _registry_lock:
+        pools = [_read_pools.pop(key) for key in list(_read_pools) if key[0] == db_file]
+        writer = _write_queues.pop(db_file, None)
+    for pool in pools:
+        pool.close()
+    if writer is not None:
+        writer.close()
+
+# Pool of aiosqlite connections for coroutine functions. aiosqlite
+# connections and asyncio primitives belong to one event loop, so pools are
+# kept per loop (and disappear with it).
+class AsyncConnectionPool:
+    def __init__(self, db_file, size=8, profile=None, read_only=False):
+        self.db_file = db_file
+        self.size = size
+        self.profile = profile
+        self.read_only = read_only
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def acquire(self):
+        await self._slots.acquire()
+        if self._idle:
+            return self._idle.pop()
+        try:
+            if self.read_only:
+                conn = await aiosqlite.connect(f"file:{os.path.abspath(self.db_file)}?mode=ro", uri=True)
+            else:
+                conn = await aiosqlite.connect(self.db_file)
+            if self.profile is not None:
+                for pragma, value in CONNECTION_PROFILES[self.profile].items():
+                    if not (self.read_only and pragma == "journal_mode"):
+                        await conn.execute(f"PRAGMA {pragma}={value}")
+            return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, conn):
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+            self._idle.append(conn)
+        except BaseException:
+            await conn.close()  # broken connection: drop it, a new one is opened on demand
+            raise
+        finally:
+            self._slots.release()
+
+    async def close(self):
+        while self._idle:
+            await self._idle.pop().close()
+
+_async_pools = weakref.WeakKeyDictionary()
+
+def get_async_pool(db_file, size=8, profile=None, read_only=False):
+    pools = _async_pools.setdefault(asyncio.get_running_loop(), {})
+    key = (db_file, profile, read_only)
+    if key not in pools:
+        pools[key] = AsyncConnectionPool(db_file, size, profile, read_only)
+    return pools[key]
+
+async def close_async_pools():
+    for pool in _async_pools.pop(asyncio.get_running_loop(), {}).values():
+        await pool.close()
+
+def _async_with_db_connection(func, mode, db_file, pool_size, profile):
+    if mode == "read":
+        def pool():
+            return get_async_pool(db_file, pool_size, profile or "read_heavy", read_only=True)
+    elif mode == "write":
+        # One connection: writes run one at a time, like the WriteQueue thread
+        def pool():
+            return get_async_pool(db_file, 1, profile or "write_heavy")
+    else:
+        def pool():
+            return get_async_pool(db_file, pool_size, profile)
+
+    @functools.wraps(func)
+    async def async_wrapper(*args, **kwargs):
+        connections = pool()
+        conn = await connections.acquire()
+        try:
+            result = await func(conn, *args, **kwargs)
+            if mode == "write":
+                await conn.commit()
+            return result
+        finally:
+            await connections.release(conn)  # rolls back anything left uncommitted
+    return async_wrapper
+
+# Iterator over a cursor that fetches batch_size rows at a time and holds the
+# connection until it is done: release(conn) runs when the rows run out, on
+# close(), at the end of a with block, or when the stream is garbage collected.
+class RowStream:
+    def __init__(self, conn, cursor, batch_size=500, release=None):
+        self.conn = conn
+        self.cursor = cursor
+        self.batch_size = batch_size
+        self.closed = False
+        self._release = release or sqlite3.Connection.close
+        try:
+            # Fetch the first batch right away, so any error that happens
+            # before the first row surfaces in the decorated call itself
+            # (where retry_on_failure can still retry it).
+            self._batch = cursor.fetchmany(batch_size)
+        except BaseException:
+            self.close()
+            raise
+        self._index = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._index >= len(self._batch):
+            if self.closed or len(self._batch) < self.batch_size:
+                self.close()
+                raise StopIteration
+            self._batch = self.cursor.fetchmany(self.batch_size)
+            self._index = 0
+            if not self._batch:
+                self.close()
+                raise StopIteration
+        row = self._batch[self._index]
+        self._index += 1
+        return row
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._batch = []
+            try:
+                self.cursor.close()
+            finally:
+                self._release(self.conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __del__(self):
+        self.close()
+
+# stream=True: the function returns a cursor and the caller gets a RowStream,
+# which keeps the connection (or the read pool's connection) until it is closed
+def _streaming_with_db_connection(func, mode, db_file, pool_size, profile, batch_size):
+    @functools.wraps(func)
+    def stream_wrapper(*args, **kwargs):
+        if mode == "read":
+            get_write_queue(db_file)
+            pool = get_read_pool(db_file, pool_size, profile)
+            conn, release = pool.acquire(), pool.release
+        else:
+            conn, release = apply_profile(sqlite3.connect(db_file), profile), sqlite3.Connection.close
+        try:
+            cursor = func(conn, *args, **kwargs)
+        except BaseException:
+            release(conn)
+            raise
+        return RowStream(conn, cursor, batch_size, release)  # the stream releases conn from here on
+    return stream_wrapper
+
+def with_db_connection(func=None, *, mode=None, db_file="my_database.db", pool_size=8, profile=None,
+                       stream=False, batch_size=500):
+    if func is None:
+        return lambda f: with_db_connection(f, mode=mode, db_file=db_file, pool_size=pool_size, profile=profile,
+                                            stream=stream, batch_size=batch_size)
+
+    if inspect.iscoroutinefunction(func):
+        if stream:
+            raise TypeError("stream=True needs a regular function returning a cursor, not a coroutine function")
+        return _async_with_db_connection(func, mode, db_file, pool_size, profile)
+
+    if stream:
+        if mode == "write":
+            raise ValueError("stream=True is for reads; mode='write' runs on the writer thread")
+        return _streaming_with_db_connection(func, mode, db_file, pool_size, profile, batch_size)
+
+    if mode == "read":
+        @functools.wraps(func)
+        def read_wrapper(*args, **kwargs):
+            # Make sure the writer has switched the file to WAL before opening readers
+            get_write_queue(db_file)
+            pool = get_read_pool(db_file, pool_size, profile)
+            conn = pool.acquire()
+            try:
+                return func(conn, *args, **kwargs)
+            finally:
+                pool.release(conn)
+        return read_wrapper
+
+    if mode == "write":
+        @functools.wraps(func)
+        def write_wrapper(*args, **kwargs):
+            return get_write_queue(db_file, profile).submit(func, args, kwargs)
+        return write_wrapper
 
-def with_db_connection(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         # Open the database connection
-        conn = sqlite3.connect("my_database.db")  # change to your DB file
+        conn = apply_profile(sqlite3.connect(db_file), profile)
         try:
             # Call the decorated function with the connection as the first argument
             result = func(conn, *args, **kwargs)
@@ -26,6 +397,150 @@ def get_user_by_id(conn, user_id):
 user = get_user_by_id(user_id=1)
 print(user)
 
+# Read/write split: reads use the read-only pool, writes go through the writer thread
+@with_db_connection(mode="read")
+def get_user_by_id_ro(conn, user_id):
+    return conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+
+@with_db_connection(mode="write")
+def update_user_email(conn, user_id, new_email):
+    conn.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+
+update_user_email(user_id=1, new_email="Crawford_Cartwright@hotmail.com")
+print(get_user_by_id_ro(user_id=1))
+
+# Connection profiles: a named PRAGMA set applied to each new connection
+@with_db_connection(profile="read_heavy")
+def count_users(conn):
+    return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+print(count_users())
+
+# async def functions get a pooled aiosqlite connection instead (read-only for mode="read")
+@with_db_connection(mode="read")
+async def get_user_by_id_async(conn, user_id):
+    async with conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)) as cursor:
+        return await cursor.fetchone()
+
+async def main():
+    print(await asyncio.gather(*(get_user_by_id_async(user_id) for user_id in (1, 2, 3))))
+    await close_async_pools()
+
+asyncio.run(main())
+
+# Streaming: the function returns a cursor, rows arrive batch_size at a time
+# and the connection is released when the stream ends or is closed
+@with_db_connection(mode="read", stream=True, batch_size=100)
+def stream_users(conn, query):
+    return conn.execute(query)
+
+print(sum(1 for _ in stream_users("SELECT * FROM users")), "users streamed")
+with stream_users("SELECT * FROM users") as users:
+    first_ten = [next(users) for _ in range(10)]  # stop early: the with block releases the connection
+print(first_ten[0], users.closed)
+
+
+# Benchmark: mixed read/write throughput (90% reads) at 1, 4 and 16 threads,
+# comparing a fresh read-write connection per call with the read/write split.
+# It writes, so it runs on a scratch copy of the database.
+BENCH_DB = "mixed_bench.db"
+
+def remove_bench_db():
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(BENCH_DB + suffix):
+            os.remove(BENCH_DB + suffix)
+
+def copy_for_benchmark(source="my_database.db"):
+    remove_bench_db()
+    src, dst = sqlite3.connect(source), sqlite3.connect(BENCH_DB)
+    src.backup(dst)
+    src.close()
+    dst.close()
+
+def run_mixed_benchmark(operations=4000, write_ratio=0.1):
+    copy_for_benchmark()
+
+    @with_db_connection(db_file=BENCH_DB)
+    def naive_read(conn, user_id):
+        return conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+
+    @with_db_connection(db_file=BENCH_DB)
+    def naive_write(conn, user_id):
+        conn.execute("UPDATE users SET age = age + 1 WHERE id = ?", (user_id,))
+        conn.commit()
+
+    @with_db_connection(mode="read", db_file=BENCH_DB, pool_size=16)
+    def split_read(conn, user_id):
+        return conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+
+    @with_db_connection(mode="write", db_file=BENCH_DB)
+    def split_write(conn, user_id):
+        conn.execute("UPDATE users SET age = age + 1 WHERE id = ?", (user_id,))
+
+    def worker(read, write, count, errors):
+        rng = random.Random()
+        for _ in range(count):
+            user_id = rng.randint(1, 100)
+            try:
+                if rng.random() < write_ratio:
+                    write(user_id)
+                else:
+                    read(user_id)
+            except sqlite3.OperationalError:  # "database is locked"
+                errors.append(1)
+
+    print(f"\nMixed workload: {operations} ops, {write_ratio:.0%} writes")
+    print(f"{'threads':>8} {'naive ops/s':>12} {'locked':>7} {'split ops/s':>12} {'locked':>7}")
+    try:
+        for threads in (1, 4, 16):
+            row = [f"{threads:>8}"]
+            for read, write in ((naive_read, naive_write), (split_read, split_write)):
+                errors = []
+                start = time.perf_counter()
+                with ThreadPoolExecutor(threads) as pool:
+                    for _ in range(threads):
+                        pool.submit(worker, read, write, operations // threads, errors)
+                elapsed = time.perf_counter() - start
+                row.append(f"{operations / elapsed:>12.0f} {len(errors):>7}")
+            print(" ".join(row))
+    finally:
+        close_pools(BENCH_DB)
+        remove_bench_db()
+
+run_mixed_benchmark()
+
+
+# Benchmark: point lookups per second under one event loop, with a new
+# aiosqlite connection per call versus the pooled async with_db_connection
+async def run_async_benchmark(calls=2000, concurrency=50):
+    async def naive_get_user_by_id(user_id):
+        async with aiosqlite.connect("my_database.db") as conn:
+            async with conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)) as cursor:
+                return await cursor.fetchone()
+
+    @with_db_connection
+    async def pooled_get_user_by_id(conn, user_id):
+        async with conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)) as cursor:
+            return await cursor.fetchone()
+
+    async def run(fetch):
+        limit = asyncio.Semaphore(concurrency)
+
+        async def one(user_id):
+            async with limit:
+                return await fetch(user_id)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i % 100 + 1) for i in range(calls)))
+        return calls / (time.perf_counter() - start)
+
+    print(f"\n{calls} async lookups, {concurrency} in flight")
+    print(f"  connection per call: {await run(naive_get_user_by_id):>8.0f} calls/s")
+    print(f"  pooled connections:  {await run(pooled_get_user_by_id):>8.0f} calls/s")
+    await close_async_pools()
+
+asyncio.run(run_async_benchmark())
+
 How it works:
 
 The decorator with_db_connection opens a connection.
@@ -33,3 +548,19 @@ The decorator with_db_connection opens a connection.
 Passes the conn object to your function.
 
 Closes the connection automatically after the function finishes (even if an error occurs).
+
+With mode="read" the function gets a connection from a ReadPool instead: connections opened with mode=ro on a WAL-mode database, reused between calls and returned to the pool afterward.
+
+With mode="write" the call is handed to the WriteQueue thread, which owns the only read-write connection. Writes run one at a time (so there is no "database is locked" to retry), are committed on success and rolled back on error, and the caller gets the result or exception back. The queue is bounded, so producers block instead of queuing unlimited work.
+
+profile="read_heavy" | "write_heavy" | "bulk_load" applies a named PRAGMA set (journal_mode, synchronous, mmap_size, cache_size) from CONNECTION_PROFILES to each new connection. By default the read pool uses read_heavy (without journal_mode, which a read-only connection can't change) and the writer uses write_heavy. With mode="read", profile= picks the read pool's profile (one pool per file and profile). With mode="write" it sets the writer's profile. There is only one writer per file, so asking for a different profile than the running writer has raises ValueError.
+
+With stream=True the function returns a cursor instead of rows, and the caller gets a RowStream. It fetches batch_size rows at a time with fetchmany and keeps the connection until the rows run out, close() is called, a with block ends or the stream is garbage collected. Then it closes the connection, or with mode="read" gives it back to the read pool. The first batch is fetched inside the decorated call, so errors before the first row are raised there, where retry_on_failure (3-retry_on_failure.py) can retry them; later errors reach the caller during iteration, since rows have already been handed out. mode="write" and async functions don't stream.
+
+On an async def function the decorator borrows an aiosqlite connection from an AsyncConnectionPool instead (kept per event loop; close_async_pools() closes them). mode="read" uses mode=ro connections with the read_heavy profile. mode="write" uses a single write_heavy connection, so writes run one at a time, and it commits on success. Whatever is left uncommitted is rolled back when the connection goes back to the pool.
+
+If the writer thread can't open the database, the first write raises that error instead of hanging, and the next write tries again. Creating a pool or writer only holds a lock for that file, never the whole registry.
+
+The benchmark at the bottom runs a 90/10 read/write mix at 1, 4 and 16 threads, with a new read-write connection per call versus the read/write split, and reports throughput and lock errors. It writes, so it runs on a scratch copy of the database (mixed_bench.db) and leaves my_database.db unchanged. Afterwards close_pools("mixed_bench.db") closes the read pool and the writer for the copy, and the copy is deleted.
+
+The async benchmark runs 2,000 point lookups, 50 at a time under asyncio.gather, once with a new aiosqlite connection per call and once through the pooled async with_db_connection. Each aiosqlite connection starts its own thread, so the pool saves a connect and a thread start on every call.
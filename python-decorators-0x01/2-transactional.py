@@ -1,9 +1,24 @@
 let me build a transactional decorator that wraps a function call in a try/except block, committing on success and rolling back on error. I'm also going to include my previous with_db_connection decorator so the connection is automatically managed. Here's a complete script:
 import sqlite3
+import asyncio
+import inspect
+import aiosqlite
 import functools
+import threading
+import queue
+import time
+import atexit
+from concurrent.futures import Future
 
 # Decorator to automatically manage DB connections
 def with_db_connection(func):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            async with aiosqlite.connect("my_database.db") as conn:
+                return await func(conn, *args, **kwargs)
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         conn = sqlite3.connect("my_database.db")  # change to your DB file
@@ -14,18 +29,243 @@ def with_db_connection(func):
         return result
     return wrapper
 
-# Decorator to manage transactions
-def transactional(func):
-    @functools.wraps(func)
-    def wrapper(conn, *args, **kwargs):
+# How many transactional calls are currently open on each connection.
+# Depth 0 means "outermost": commit/rollback. Anything deeper uses a SAVEPOINT.
+_tx_depth = {}
+
+def _run_in_transaction(conn, func, args, kwargs):
+    depth = _tx_depth.get(conn, 0)
+    _tx_depth[conn] = depth + 1
+    try:
+        if depth == 0:
+            try:
+                if not conn.in_transaction:
+                    # Open the transaction now, so savepoints taken by nested calls
+                    # sit inside it (a SAVEPOINT outside a transaction would start,
+                    # and its RELEASE commit, a transaction of its own)
+                    conn.execute("BEGIN")
+                result = func(conn, *args, **kwargs)
+                conn.commit()  # commit if function succeeds
+                return result
+            except Exception as e:
+                conn.rollback()  # rollback if any error occurs
+                print(f"Transaction rolled back due to error: {e}")
+                raise  # re-raise the exception
+
+        # Nested call: only undo this call's work, not the enclosing transaction
+        savepoint = f"sp_{depth}"
+        conn.execute(f"SAVEPOINT {savepoint}")
         try:
             result = func(conn, *args, **kwargs)
-            conn.commit()  # commit if function succeeds
-            return result
         except Exception as e:
-            conn.rollback()  # rollback if any error occurs
-            print(f"Transaction rolled back due to error: {e}")
-            raise  # re-raise the exception
+            conn.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+            conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+            print(f"Savepoint {savepoint} rolled back due to error: {e}")
+            raise
+        conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+        return result
+    finally:
+        if depth == 0:
+            _tx_depth.pop(conn, None)
+        else:
+            _tx_depth[conn] = depth
+
+# Same as _run_in_transaction, for coroutine functions on an aiosqlite connection
+async def _run_in_transaction_async(conn, func, args, kwargs):
+    depth = _tx_depth.get(conn, 0)
+    _tx_depth[conn] = depth + 1
+    try:
+        if depth == 0:
+            try:
+                if not conn.in_transaction:
+                    await conn.execute("BEGIN")
+                result = await func(conn, *args, **kwargs)
+                await conn.commit()
+                return result
+            except BaseException as e:  # includes CancelledError: never leave a half-done transaction
+                await asyncio.shield(conn.rollback())
+                print(f"Transaction rolled back due to error: {e!r}")
+                raise
+
+        savepoint = f"sp_{depth}"
+        await conn.execute(f"SAVEPOINT {savepoint}")
+        try:
+            result = await func(conn, *args, **kwargs)
+        except BaseException as e:
+            await asyncio.shield(conn.execute(f"ROLLBACK TO SAVEPOINT {savepoint}"))
+            await asyncio.shield(conn.execute(f"RELEASE SAVEPOINT {savepoint}"))
+            print(f"Savepoint {savepoint} rolled back due to error: {e!r}")
+            raise
+        await conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+        return result
+    finally:
+        if depth == 0:
+            _tx_depth.pop(conn, None)
+        else:
+            _tx_depth[conn] = depth
+
+# Gathers transactional calls from many threads into one database transaction
+class GroupCommitter:
+    def __init__(self, db_file, max_batch_size=64, max_delay=0.005):
+        self.db_file = db_file
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay  # seconds to wait for more calls to join a batch
+        self.batches = 0
+        self.calls = 0
+        self._queue = queue.Queue()
+        self._callers = 0  # threads inside submit(), i.e. calls queued or about to be
+        self._callers_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._startup_error = None
+        self._thread = threading.Thread(
+            target=self._run, name=f"group-commit:{db_file}", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+        if self._startup_error is not None:
+            # e.g. the file can't be opened: fail the first caller instead of hanging it
+            raise self._startup_error
+
+    def submit(self, func, args, kwargs):
+        if threading.current_thread() is self._thread:
+            # A group-commit function called from inside a batch: run it inline
+            # as a nested savepoint instead of waiting on ourselves.
+            return _run_in_transaction(self._conn, func, args, kwargs)
+        future = Future()
+        with self._callers_lock:
+            self._callers += 1
+        try:
+            self._queue.put((func, args, kwargs, future))
+            return future.result()  # blocks until the whole batch has committed
+        finally:
+            with self._callers_lock:
+                self._callers -= 1
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        try:
+            # Autocommit mode so BEGIN/COMMIT are issued explicitly below
+            self._conn = sqlite3.connect(self.db_file, isolation_level=None)
+        except BaseException as e:
+            self._startup_error = e
+            return
+        finally:
+            self._ready.set()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                batch = [item]
+                deadline = time.monotonic() + self.max_delay
+                while len(batch) < self.max_batch_size:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        # Only wait for calls another thread is about to queue;
+                        # a lone caller (or a single-thread loop) commits at once
+                        remaining = deadline - time.monotonic()
+                        if self._callers <= len(batch) or remaining <= 0:
+                            break
+                        try:
+                            item = self._queue.get(timeout=remaining)
+                        except queue.Empty:
+                            break
+                    if item is None:
+                        self._commit_batch(batch)
+                        return
+                    batch.append(item)
+                self._commit_batch(batch)
+        finally:
+            self._conn.close()
+
+    def _commit_batch(self, batch):
+        conn = self._conn
+        outcomes = []
+        _tx_depth[conn] = 1  # every call in the batch becomes a savepoint
+        try:
+            conn.execute("BEGIN")
+            for func, args, kwargs, future in batch:
+                try:
+                    outcomes.append((future, _run_in_transaction(conn, func, args, kwargs), None))
+                except Exception as e:
+                    outcomes.append((future, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            # BEGIN or COMMIT itself failed: nothing in this batch was written
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            print(f"Group commit of {len(batch)} calls rolled back due to error: {e}")
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+        finally:
+            _tx_depth.pop(conn, None)
+        self.batches += 1
+        self.calls += len(batch)
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+# One committer per database file so every group-commit function shares batches
+_committers = {}
+_committers_lock = threading.Lock()
+
+def _get_committer(db_file, max_batch_size, max_delay):
+    with _committers_lock:
+        committer = _committers.get(db_file)
+        if committer is None:
+            committer = GroupCommitter(db_file, max_batch_size, max_delay)
+            _committers[db_file] = committer
+        elif (committer.max_batch_size, committer.max_delay) != (max_batch_size, max_delay):
+            raise ValueError(
+                f"group commit for {db_file} already uses max_batch_size={committer.max_batch_size}, "
+                f"max_delay={committer.max_delay}; got max_batch_size={max_batch_size}, max_delay={max_delay}"
+            )
+        return committer
+
+@atexit.register
+def _close_committers():
+    for committer in list(_committers.values()):
+        committer.close()
+
+# Decorator to manage transactions
+def transactional(func=None, *, group_commit=False, db_file="my_database.db",
+                  max_batch_size=64, max_delay=0.005):
+    if func is None:
+        return lambda f: transactional(
+            f, group_commit=group_commit, db_file=db_file,
+            max_batch_size=max_batch_size, max_delay=max_delay,
+        )
+
+    if inspect.iscoroutinefunction(func):
+        if group_commit:
+            # The committer thread runs plain functions on its own sqlite3 connection
+            raise TypeError("group_commit=True needs a regular function, not a coroutine function")
+
+        @functools.wraps(func)
+        async def async_wrapper(conn, *args, **kwargs):
+            return await _run_in_transaction_async(conn, func, args, kwargs)
+        return async_wrapper
+
+    if group_commit:
+        # The committer owns the connection, so don't stack with_db_connection here
+        committer = _get_committer(db_file, max_batch_size, max_delay)
+
+        @functools.wraps(func)
+        def group_wrapper(*args, **kwargs):
+            return committer.submit(func, args, kwargs)
+        group_wrapper.committer = committer
+        return group_wrapper
+
+    @functools.wraps(func)
+    def wrapper(conn, *args, **kwargs):
+        return _run_in_transaction(conn, func, args, kwargs)
     return wrapper
 
 # Example usage
@@ -41,6 +281,31 @@ def update_user_email(conn, user_id, new_email):
 # Update user's email with automatic transaction handling
 update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
 
+# Coroutine functions get the same commit/rollback/savepoint handling, awaited
+@with_db_connection
+@transactional
+async def update_user_email_async(conn, user_id, new_email):
+    await conn.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+
+asyncio.run(update_user_email_async(1, 'Crawford_Cartwright@hotmail.com'))
+
+# Group commit: rapid-fire updates from several threads share one COMMIT (one fsync)
+@transactional(group_commit=True, db_file="my_database.db", max_batch_size=64, max_delay=0.005)
+def bulk_update_user_email(conn, user_id, new_email):
+    conn.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+
+def update_many(start):
+    for user_id in range(start, start + 25):
+        bulk_update_user_email(user_id, f"user{user_id}@example.com")
+
+threads = [threading.Thread(target=update_many, args=(start,)) for start in (1, 26, 51, 76)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+committer = bulk_update_user_email.committer
+print(f"{committer.calls} updates committed in {committer.batches} transactions")
+
 How it works:
 
 with_db_connection opens/closes the connection.
@@ -48,3 +313,9 @@ with_db_connection opens/closes the connection.
 transactional ensures that any changes are committed if successful or rolled back on error.
 
 The decorators can be combined in any order (here connection first, transaction inside).
+
+If a transactional function calls another one on the same connection, the inner call runs inside a SAVEPOINT, so its failure only undoes its own work and the outer transaction decides whether to commit.
+
+On async def functions (with aiosqlite connections) transactional awaits BEGIN, COMMIT and the savepoints. It also rolls back when the task is cancelled. group_commit=True needs a regular function, because the committer thread runs calls on its own sqlite3 connection.
+
+With group_commit=True, calls are handed to a background GroupCommitter that owns one connection per database file. It takes every call already queued, and waits up to max_delay for more only while other threads are inside a group-commit call that hasn't reached the queue yet, so a single thread calling in a loop commits each call at once instead of sleeping max_delay every time. A batch stops at max_batch_size calls. It runs each one in its own savepoint and then issues a single COMMIT. All group-commit functions on a database file share its committer, so they must use the same max_batch_size and max_delay (a conflicting setting raises ValueError). Each caller still gets its own return value or exception; only a failing BEGIN/COMMIT fails the whole batch. If the committer can't open the database, creating it (the first group-commit decoration for that file) raises the error instead of leaving callers waiting.
@@ -1,7 +1,12 @@
 retry_on_failure decorator that retries a database operation a few times if it fails due to transient errors. Here’s a full working example including your with_db_connection decorator:
 import time
 import sqlite3
+import asyncio
+import inspect
+import aiosqlite
 import functools
+import threading
+from collections import Counter, deque
 
 # Decorator to automatically manage DB connections
 def with_db_connection(func):
@@ -14,19 +19,165 @@ def with_db_connection(func):
             conn.close()
     return wrapper
 
-# Decorator to retry on failure
-def retry_on_failure(retries=3, delay=2):
+# Metrics: every state change is counted here and passed to each listener as
+# (metric_name, value, tags), so it can be forwarded to statsd/Prometheus/etc.
+breaker_metrics = Counter()
+metric_listeners = [
+    lambda name, value, tags: print(f"[METRIC] {name}={value} {tags}"),
+]
+
+def emit_metric(name, value, tags):
+    breaker_metrics[(name, tuple(sorted(tags.items())))] += 1
+    for listener in metric_listeners:
+        listener(name, value, tags)
+
+class CircuitOpenError(Exception):
+    pass
+
+# Circuit breaker: trips to "open" when the failure rate over the last
+# window seconds reaches failure_rate (after at least min_calls calls).
+# While open, calls fail fast. After open_timeout it lets up to
+# half_open_max_calls trial calls through ("half_open"); if they succeed the
+# circuit closes, if one fails it opens again.
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name, failure_rate=0.5, min_calls=5, window=30.0,
+                 open_timeout=30.0, half_open_max_calls=1):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_timeout = open_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self._results = deque()  # (timestamp, succeeded) inside the window
+        self._opened_at = 0.0
+        self._trials = 0
+        self._trial_successes = 0
+        self._lock = threading.Lock()
+
+    def _set_state(self, state):
+        old, self.state = self.state, state
+        emit_metric("circuit_breaker.state_change", 1, {"breaker": self.name, "from": old, "to": state})
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.open_timeout:
+                    return False
+                self._set_state(self.HALF_OPEN)
+                self._trials = self._trial_successes = 0
+            if self.state == self.HALF_OPEN:
+                if self._trials >= self.half_open_max_calls:
+                    return False
+                self._trials += 1
+            return True
+
+    def record(self, succeeded):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.HALF_OPEN:
+                if not succeeded:
+                    self._open(now)
+                else:
+                    self._trial_successes += 1
+                    if self._trial_successes >= self.half_open_max_calls:
+                        self._results.clear()
+                        self._set_state(self.CLOSED)
+                return
+            if self.state == self.OPEN:
+                return  # a call admitted before the circuit opened
+            self._results.append((now, succeeded))
+            while self._results and now - self._results[0][0] > self.window:
+                self._results.popleft()
+            failures = sum(1 for _, ok in self._results if not ok)
+            if len(self._results) >= self.min_calls and failures / len(self._results) >= self.failure_rate:
+                self._open(now)
+
+    def _open(self, now):
+        self._opened_at = now
+        self._set_state(self.OPEN)
+
+# Named breakers, so functions that hit the same database can share one
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name, **options):
+    with _breakers_lock:
+        circuit = _breakers.get(name)
+        if circuit is None:
+            circuit = _breakers[name] = CircuitBreaker(name, **options)
+            return circuit
+    # Shared breakers keep the settings they were created with
+    inspect.signature(CircuitBreaker).bind(name, **options)  # TypeError on unknown options, as for a new one
+    conflicts = {key: value for key, value in options.items() if getattr(circuit, key) != value}
+    if conflicts:
+        current = {key: getattr(circuit, key) for key in conflicts}
+        raise ValueError(f"breaker {name!r} already exists with {current}, not {conflicts}")
+    return circuit
+
+# Decorator to retry on failure.
+# breaker=True gives the function its own circuit breaker, breaker="users.db"
+# shares a named one, or pass a CircuitBreaker instance.
+def retry_on_failure(retries=3, delay=2, breaker=None, **breaker_options):
     def decorator(func):
+        if breaker is True:
+            circuit = get_breaker(func.__qualname__, **breaker_options)
+        elif isinstance(breaker, str):
+            circuit = get_breaker(breaker, **breaker_options)
+        else:
+            if breaker_options:
+                raise ValueError(f"breaker options {sorted(breaker_options)} need breaker=True or a breaker name, not {breaker!r}")
+            circuit = breaker
+
+        if inspect.iscoroutinefunction(func):
+            # Same loop, but each attempt is awaited and the pause is
+            # asyncio.sleep, so other tasks keep running while we wait
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                last_exception = None
+                for attempt in range(1, retries + 1):
+                    if circuit is not None and not circuit.allow():
+                        raise CircuitOpenError(f"circuit '{circuit.name}' is open") from last_exception
+                    try:
+                        result = await func(*args, **kwargs)
+                    except Exception as e:
+                        last_exception = e
+                        if circuit is not None:
+                            circuit.record(False)
+                            if circuit.state == CircuitBreaker.OPEN:
+                                raise
+                        print(f"Attempt {attempt} failed: {e}. Retrying in {delay} seconds...")
+                        await asyncio.sleep(delay)
+                    else:
+                        if circuit is not None:
+                            circuit.record(True)
+                        return result
+                raise last_exception
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             last_exception = None
             for attempt in range(1, retries + 1):
+                if circuit is not None and not circuit.allow():
+                    # Fail fast instead of holding the thread for retries * delay
+                    raise CircuitOpenError(f"circuit '{circuit.name}' is open") from last_exception
                 try:
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
                 except Exception as e:
                     last_exception = e
+                    if circuit is not None:
+                        circuit.record(False)
+                        if circuit.state == CircuitBreaker.OPEN:
+                            raise  # this failure tripped the circuit: don't sleep, don't retry
                     print(f"Attempt {attempt} failed: {e}. Retrying in {delay} seconds...")
                     time.sleep(delay)
+                else:
+                    if circuit is not None:
+                        circuit.record(True)
+                    return result
             # If all retries fail, raise the last exception
             raise last_exception
         return wrapper
@@ -44,6 +195,30 @@ def fetch_users_with_retry(conn):
 users = fetch_users_with_retry()
 print(users)
 
+# Circuit breaker: the "database" is down, so after a few failures calls fail fast
+@retry_on_failure(retries=3, delay=0.01, breaker="users.db", min_calls=3, open_timeout=0.5)
+def fetch_from_missing_table():
+    conn = sqlite3.connect("my_database.db")
+    try:
+        return conn.execute("SELECT * FROM no_such_table").fetchall()
+    finally:
+        conn.close()
+
+for _ in range(3):
+    try:
+        fetch_from_missing_table()
+    except (CircuitOpenError, sqlite3.OperationalError) as e:
+        print(type(e).__name__, e)
+print(get_breaker("users.db").state)
+
+# async def functions are awaited on every attempt and wait with asyncio.sleep
+@retry_on_failure(retries=3, delay=0.01)
+async def fetch_users_async():
+    async with aiosqlite.connect("my_database.db") as conn:
+        return await conn.execute_fetchall("SELECT * FROM users")
+
+print(len(asyncio.run(fetch_users_async())))
+
 
 How it works:
 
@@ -52,3 +227,13 @@ with_db_connection manages opening/closing the database.
 retry_on_failure attempts the operation multiple times if an exception occurs, waiting delay seconds between retries.
 
 If all retries fail, it raises the last exception.
+
+Streaming results (with_db_connection(stream=True) in 1-with_db_connection.py) need no special handling: put retry_on_failure outside it. The RowStream fetches its first batch inside the call, so anything that fails before the first row is retried with a fresh connection, and the breaker sees it. Errors while the caller iterates later are not retried, because rows have already been handed out.
+
+On an async def function every attempt is awaited, so a failing query is actually retried (instead of returning an un-awaited coroutine), and the pause between attempts is asyncio.sleep rather than time.sleep, so the event loop keeps running. The circuit breaker works the same way.
+
+With breaker=..., every attempt is reported to a CircuitBreaker. When the failure rate over the last window seconds reaches failure_rate (and at least min_calls calls were seen), the circuit opens and calls raise CircuitOpenError straight away instead of sleeping through their retries. After open_timeout seconds, up to half_open_max_calls trial calls are let through; if they all succeed the circuit closes, and one failure opens it again.
+
+Breakers can be per function (breaker=True) or shared by name, for example one per target database (breaker="users.db"). A shared breaker keeps the options it was created with: asking for the same name with different ones raises ValueError, and so do options passed along with a CircuitBreaker instance (configure the instance instead) or without a breaker.
+
+Each state change is emitted as a circuit_breaker.state_change metric: counted in breaker_metrics and passed to every function in metric_listeners (by default printed).
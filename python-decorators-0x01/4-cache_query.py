@@ -1,34 +1,699 @@
 a decorator that caches query results in a dictionary so that repeated queries don’t hit the database unnecessarily. Here’s a working implementation including with_db_connection:
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import signal
+import pickle
 import sqlite3
+import asyncio
+import inspect
+import weakref
+import aiosqlite
 import functools
+import threading
+import contextlib
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Decorator to automatically manage DB connections. With stream=True the
+# function returns a cursor and the caller gets a RowStream (the full version,
+# with pools and profiles, is in 1-with_db_connection.py)
+def with_db_connection(func=None, *, stream=False, batch_size=500):
+    if func is None:
+        return lambda f: with_db_connection(f, stream=stream, batch_size=batch_size)
 
-# Decorator to automatically manage DB connections
-def with_db_connection(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         conn = sqlite3.connect("my_database.db")  # change to your DB file
+        if not stream:
+            try:
+                return func(conn, *args, **kwargs)
+            finally:
+                conn.close()
         try:
-            return func(conn, *args, **kwargs)
-        finally:
+            cursor = func(conn, *args, **kwargs)
+        except BaseException:
             conn.close()
+            raise
+        return RowStream(conn, cursor, batch_size)  # the stream closes conn from here on
     return wrapper
 
+# Same RowStream as in 1-with_db_connection.py: fetches batch_size rows at a
+# time and closes the cursor and connection when done, on close() or at the
+# end of a with block
+class RowStream:
+    def __init__(self, conn, cursor, batch_size=500, release=None):
+        self.conn = conn
+        self.cursor = cursor
+        self.batch_size = batch_size
+        self.closed = False
+        self._release = release or sqlite3.Connection.close
+        try:
+            self._batch = cursor.fetchmany(batch_size)
+        except BaseException:
+            self.close()
+            raise
+        self._index = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._index >= len(self._batch):
+            if self.closed or len(self._batch) < self.batch_size:
+                self.close()
+                raise StopIteration
+            self._batch = self.cursor.fetchmany(self.batch_size)
+            self._index = 0
+            if not self._batch:
+                self.close()
+                raise StopIteration
+        row = self._batch[self._index]
+        self._index += 1
+        return row
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._batch = []
+            try:
+                self.cursor.close()
+            finally:
+                self._release(self.conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __del__(self):
+        self.close()
+
+# One cached result. ttl is how long it is fresh (None = forever); after that
+# it may still be served for stale_ttl more seconds while it is refreshed.
+# stored_at is wall-clock time so entries can be shared between processes.
+CacheEntry = namedtuple("CacheEntry", "value stored_at ttl stale_ttl")
+
 # Simple cache dictionary
 query_cache = {}
 
+# Storage interface used by cache_query: get(key) -> CacheEntry or None,
+# set(key, entry), contains(key), delete(key) and clear().
+class MemoryCacheBackend:
+    def __init__(self, store=None):
+        self.store = query_cache if store is None else store
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, entry):
+        self.store[key] = entry
+
+    def contains(self, key):
+        return key in self.store
+
+    def delete(self, key):
+        self.store.pop(key, None)
+        _drop_stats(self, [key])
+
+    def clear(self):
+        self.store.clear()
+        _drop_stats(self)
+
+# Pickle, and compress anything big enough for zlib to be worth it.
+# The first byte says which one it is.
+_RAW, _ZLIB = b"r", b"z"
+
+def serialize(value, compress_over=1024):
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) > compress_over:
+        return _ZLIB + zlib.compress(data, 1)
+    return _RAW + data
+
+def deserialize(blob):
+    blob = bytes(blob)
+    data = zlib.decompress(blob[1:]) if blob[:1] == _ZLIB else blob[1:]
+    return pickle.loads(data)
+
+# Shared on-disk cache: a small SQLite file in WAL mode that any number of
+# local processes (gunicorn workers, multiprocessing children) can read and
+# write. When the stored values exceed max_bytes, the least recently used
+# entries are evicted.
+class SQLiteCacheBackend:
+    def __init__(self, path="query_cache.db", max_bytes=64 * 1024 * 1024, touch_interval=5.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval  # at most one last_access write per key per interval
+        self._local = threading.local()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, stored_at REAL NOT NULL,"
+                " ttl REAL, stale_ttl REAL NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_lru ON cache (last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_meta (id INTEGER PRIMARY KEY CHECK (id = 0), total_bytes INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO cache_meta VALUES (0, 0)")
+
+    def _connection(self):
+        # sqlite3 connections must not cross threads or a fork: one per thread per process
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, stored_at, ttl, stale_ttl, last_access FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, stored_at, ttl, stale_ttl, last_access = row
+        now = time.time()
+        if now - last_access > self.touch_interval:
+            conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+        return CacheEntry(deserialize(value), stored_at, ttl, stale_ttl)
+
+    def set(self, key, entry):
+        blob = serialize(entry.value)
+        with self._write() as conn:
+            old = conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, blob, entry.stored_at, entry.ttl, entry.stale_ttl, len(blob), time.time()),
+            )
+            conn.execute(
+                "UPDATE cache_meta SET total_bytes = total_bytes + ? WHERE id = 0",
+                (len(blob) - (old[0] if old else 0),),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        (total,) = conn.execute("SELECT total_bytes FROM cache_meta WHERE id = 0").fetchone()
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9  # free some headroom so we don't evict on every set
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM cache ORDER BY last_access"):
+            if total - freed <= target:
+                break
+            victims.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+        conn.execute("UPDATE cache_meta SET total_bytes = total_bytes - ? WHERE id = 0", (freed,))
+        _drop_stats(self, [key for (key,) in victims])
+
+    def contains(self, key):
+        return self._connection().execute("SELECT 1 FROM cache WHERE key = ?", (key,)).fetchone() is not None
+
+    def delete(self, key):
+        with self._write() as conn:
+            row = conn.execute("DELETE FROM cache WHERE key = ? RETURNING size", (key,)).fetchone()
+            if row:
+                conn.execute("UPDATE cache_meta SET total_bytes = total_bytes - ? WHERE id = 0", (row[0],))
+        _drop_stats(self, [key])
+
+    def clear(self):
+        with self._write() as conn:
+            conn.execute("DELETE FROM cache")
+            conn.execute("UPDATE cache_meta SET total_bytes = 0 WHERE id = 0")
+        _drop_stats(self)
+
+    # Closes this thread's connection; the next call opens a new one
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            conn.close()
+
+    @contextlib.contextmanager
+    def _write(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")  # take the write lock up front: no deadlock between processes
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+memory_backend = MemoryCacheBackend()
+
+# Introspection: per-key hit counts, approximate result size, age and the
+# database time that hits saved, so we can tell if the cache earns its memory.
+# Stats only cover keys the backend still holds: they are dropped on delete,
+# clear and eviction, and cache_report() drops any the backend lost otherwise
+# (query_cache.clear(), eviction by another process).
+class KeyStats:
+    __slots__ = ("backend", "hits", "misses", "size_bytes", "stored_at", "compute_ms", "saved_ms")
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.size_bytes = 0
+        self.stored_at = 0.0
+        self.compute_ms = 0.0  # what the last real query took
+        self.saved_ms = 0.0    # hits * compute_ms, summed as hits happen
+
+cache_stats = {}
+_stats_lock = threading.Lock()
+
+def approx_size(value):
+    # sys.getsizeof of the container plus its rows and their fields; good
+    # enough for fetchall() results (lists of tuples of str/int/float/bytes)
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple, set)):
+        for item in value:
+            size += approx_size(item)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            size += approx_size(key) + approx_size(item)
+    return size
+
+def _record_store(key, result, compute_ms, backend):
+    size = approx_size(result)
+    with _stats_lock:
+        stats = cache_stats.get(key)
+        if stats is None or stats.backend is not backend:
+            stats = cache_stats[key] = KeyStats(backend)
+        stats.misses += 1
+        stats.size_bytes = size
+        stats.stored_at = time.time()
+        stats.compute_ms = compute_ms
+
+def _record_hit(key):
+    with _stats_lock:
+        stats = cache_stats.get(key)
+        if stats is not None:
+            stats.hits += 1
+            stats.saved_ms += stats.compute_ms
+
+# Forget keys the backend no longer holds (all of its keys if keys is None)
+def _drop_stats(backend, keys=None):
+    with _stats_lock:
+        if keys is None:
+            keys = [key for key, stats in cache_stats.items() if stats.backend is backend]
+        for key in keys:
+            stats = cache_stats.get(key)
+            if stats is not None and stats.backend is backend:
+                del cache_stats[key]
+
+# Same normalization as log_queries' profiler in 0-log_queries.py
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def fingerprint(sql):
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _WHITESPACE.sub(" ", sql).strip().lower()
+    return _IN_LIST.sub("in (?+)", sql)
+
+_REPORT_SORT_KEYS = ("hits", "misses", "size_bytes", "age_s", "saved_ms")
+
+def cache_report(top_n=10, sort_by="hits"):
+    if sort_by not in _REPORT_SORT_KEYS:
+        raise ValueError(f"sort_by must be one of {_REPORT_SORT_KEYS}, got {sort_by!r}")
+    with _stats_lock:
+        tracked = [(key, stats.backend) for key, stats in cache_stats.items()]
+    for key, backend in tracked:
+        if not backend.contains(key):
+            _drop_stats(backend, [key])
+    now = time.time()
+    with _stats_lock:
+        keys = [
+            {
+                "key": key,
+                "hits": stats.hits,
+                "misses": stats.misses,
+                "size_bytes": stats.size_bytes,
+                "age_s": now - stats.stored_at,
+                "saved_ms": stats.saved_ms,
+            }
+            for key, stats in cache_stats.items()
+        ]
+    by_fingerprint = {}
+    for row in keys:
+        group = by_fingerprint.setdefault(fingerprint(row["key"]) if isinstance(row["key"], str) else repr(row["key"]), {
+            "fingerprint": None, "keys": 0, "hits": 0, "misses": 0, "size_bytes": 0, "age_s": 0.0, "saved_ms": 0.0,
+        })
+        group["keys"] += 1
+        for field in ("hits", "misses", "size_bytes", "saved_ms"):
+            group[field] += row[field]
+        group["age_s"] = max(group["age_s"], row["age_s"])  # age of the oldest entry
+    for name, group in by_fingerprint.items():
+        group["fingerprint"] = name
+    keys.sort(key=lambda row: row[sort_by], reverse=True)
+    fingerprints = sorted(by_fingerprint.values(), key=lambda group: group[sort_by], reverse=True)
+    return {
+        "entries": len(keys),
+        "total_bytes": sum(row["size_bytes"] for row in keys),
+        "hits": sum(row["hits"] for row in keys),
+        "misses": sum(row["misses"] for row in keys),
+        "saved_ms": sum(row["saved_ms"] for row in keys),
+        "hot_keys": keys[:top_n],
+        "fingerprints": fingerprints[:top_n],
+    }
+
+def dump_cache_report(top_n=10, sort_by="hits", file=None):
+    file = file or sys.stderr
+    report = cache_report(top_n, sort_by)
+    print(
+        f"[CACHE] {report['entries']} entries, ~{report['total_bytes'] / 1024:.1f} KiB, "
+        f"{report['hits']} hits / {report['misses']} misses, {report['saved_ms']:.1f} ms saved",
+        file=file,
+    )
+    print(f"{'hits':>8} {'misses':>7} {'KiB':>9} {'age s':>8} {'saved ms':>10}  key", file=file)
+    for row in report["hot_keys"]:
+        print(
+            f"{row['hits']:>8} {row['misses']:>7} {row['size_bytes'] / 1024:>9.1f} "
+            f"{row['age_s']:>8.1f} {row['saved_ms']:>10.1f}  {str(row['key'])[:80]}",
+            file=file,
+        )
+    print(f"{'hits':>8} {'keys':>7} {'KiB':>9} {'saved ms':>19}  fingerprint", file=file)
+    for group in report["fingerprints"]:
+        print(
+            f"{group['hits']:>8} {group['keys']:>7} {group['size_bytes'] / 1024:>9.1f} "
+            f"{group['saved_ms']:>19.1f}  {group['fingerprint'][:80]}",
+            file=file,
+        )
+    return report
+
+# Writes the hot keys as JSON lines ({"sql": ..., "hits": ...}) so the next
+# process can warm up from them (see warm_cache below)
+def save_cache_snapshot(path, top_n=100):
+    with open(path, "w") as f:
+        for row in cache_report(top_n)["hot_keys"]:
+            if isinstance(row["key"], str):
+                f.write(json.dumps({"sql": row["key"], "hits": row["hits"] + row["misses"]}) + "\n")
+
+# Picks the queries to replay from a log_queries JSON log or a cache snapshot:
+# the top_n fingerprints by call count, and for each the per_fingerprint most
+# frequent concrete statements (the literals are the parameters).
+def plan_warm_up(path, top_n=20, per_fingerprint=5):
+    by_fingerprint = Counter()
+    by_sql = Counter()
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # not a JSON record (e.g. a stray print)
+            sql = record.get("sql")
+            if not sql or record.get("error") or "?" in sql:
+                continue  # failed, or bound parameters we don't have: can't replay
+            weight = record.get("hits", 1)
+            by_fingerprint[fingerprint(sql)] += weight
+            by_sql[sql] += weight
+    plan = {}
+    for sql, _ in by_sql.most_common():
+        statements = plan.setdefault(fingerprint(sql), [])
+        if len(statements) < per_fingerprint:
+            statements.append(sql)
+    return [sql for name, _ in by_fingerprint.most_common(top_n) for sql in plan[name]]
+
+# Replays the planned queries through a cache_query-decorated function so
+# they land in the cache, at most max_workers at a time and within
+# time_budget seconds. Whatever doesn't fit in the budget is skipped.
+def warm_cache(fetch, path, top_n=20, per_fingerprint=5, max_workers=4, time_budget=2.0):
+    deadline = time.monotonic() + time_budget
+    statements = plan_warm_up(path, top_n, per_fingerprint)
+    warmed = failed = 0
+    pool = ThreadPoolExecutor(max_workers, thread_name_prefix="cache-warm-up")
+    pending = set()
+    queued = iter(statements)
+    try:
+        while True:
+            # Keep at most max_workers queries in flight
+            while len(pending) < max_workers and time.monotonic() < deadline:
+                sql = next(queued, None)
+                if sql is None:
+                    break
+                pending.add(pool.submit(fetch, query=sql))
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    warmed += 1
+                else:
+                    failed += 1
+    finally:
+        # Don't hold up startup for queries still running past the budget
+        pool.shutdown(wait=False, cancel_futures=True)
+    skipped = len(statements) - warmed - failed
+    print(f"Cache warm-up: {warmed} warmed, {failed} failed, {skipped} skipped in {time_budget - max(deadline - time.monotonic(), 0):.2f}s")
+    return {"warmed": warmed, "failed": failed, "skipped": skipped}
+
+# e.g. `kill -USR1 <pid>` prints the report without stopping the process.
+# The handler runs in the main thread between bytecodes, possibly while that
+# thread holds _stats_lock, so it only starts a thread that does the dump
+def install_report_signal(signum=getattr(signal, "SIGUSR1", None)):
+    if signum is not None:
+        signal.signal(signum, lambda *_: threading.Thread(target=dump_cache_report, name="cache-report", daemon=True).start())
+
+# Queries with a background refresh in flight, so only one runs per query
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+def _refresh_in_background(func, query, args, kwargs, entry_for, db_file, backend):
+    with _refreshing_lock:
+        if query in _refreshing:
+            return
+        _refreshing.add(query)
+
+    def refresh():
+        # The caller's connection is closed by the time this runs, so open our own
+        conn = sqlite3.connect(db_file)
+        try:
+            start = time.perf_counter()
+            result = func(conn, query, *args, **kwargs)
+            _record_store(query, result, (time.perf_counter() - start) * 1000, backend)
+            backend.set(query, entry_for(result))
+        except Exception as e:
+            print(f"Background refresh failed, keeping stale result: {e}")
+        finally:
+            conn.close()
+            with _refreshing_lock:
+                _refreshing.discard(query)
+
+    threading.Thread(target=refresh, name="cache-refresh", daemon=True).start()
+
+# Same for coroutine functions: the refresh is a task with its own aiosqlite connection
+def _refresh_in_background_async(func, query, args, kwargs, entry_for, db_file, backend):
+    with _refreshing_lock:
+        if query in _refreshing:
+            return
+        _refreshing.add(query)
+
+    async def refresh():
+        try:
+            async with aiosqlite.connect(db_file) as conn:
+                start = time.perf_counter()
+                result = await func(conn, query, *args, **kwargs)
+            _record_store(query, result, (time.perf_counter() - start) * 1000, backend)
+            backend.set(query, entry_for(result))
+        except Exception as e:
+            print(f"Background refresh failed, keeping stale result: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(query)
+
+    task = asyncio.get_running_loop().create_task(refresh())
+    _refresh_tasks.add(task)  # keep a reference until it is done
+    task.add_done_callback(_refresh_tasks.discard)
+
+_refresh_tasks = set()
+
+# Misses being computed right now, per event loop: {loop: {query: Future}}.
+# Entries are removed as soon as the query finishes, and a loop's dict goes
+# away with the loop.
+_inflight = weakref.WeakKeyDictionary()
+
+# "fresh", "stale" (servable while it is refreshed) or None
+def _freshness(entry):
+    if entry is None:
+        return None
+    if entry.ttl is None:
+        return "fresh"
+    age = time.time() - entry.stored_at
+    if age < entry.ttl:
+        return "fresh"
+    if age < entry.ttl + entry.stale_ttl:
+        return "stale"
+    return None
+
 # Decorator to cache query results based on the SQL query string
-def cache_query(func):
+def cache_query(func=None, *, ttl=None, stale_ttl=0, negative_ttl=None,
+                db_file=None, backend=memory_backend, stream=False, max_rows=1000):
+    # Stale entries are refreshed on a new connection, outside with_db_connection,
+    # so the database to refresh from has to be named here
+    if stale_ttl and db_file is None:
+        raise ValueError("stale_ttl needs db_file, the database the background refresh connects to")
+    if func is None:
+        return lambda f: cache_query(
+            f, ttl=ttl, stale_ttl=stale_ttl, negative_ttl=negative_ttl,
+            db_file=db_file, backend=backend, stream=stream, max_rows=max_rows,
+        )
+
+    def entry_for(result):
+        if not result and negative_ttl is not None:
+            # Empty result ("no such row"): remember it briefly, never serve it stale
+            return CacheEntry(result, time.time(), negative_ttl, 0)
+        return CacheEntry(result, time.time(), ttl, stale_ttl)
+
+    if stream:
+        if inspect.iscoroutinefunction(func):
+            raise TypeError("stream=True needs a regular function returning a cursor, not a coroutine function")
+        return _streaming_cache_query(func, entry_for, db_file, backend, max_rows)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(conn, query, *args, **kwargs):
+            loop = asyncio.get_running_loop()
+            inflight = _inflight.setdefault(loop, {})
+            while True:
+                entry = backend.get(query)
+                freshness = _freshness(entry)
+                if freshness is not None:
+                    _record_hit(query)
+                    if freshness == "stale":
+                        _refresh_in_background_async(func, query, args, kwargs, entry_for, db_file, backend)
+                    return entry.value
+                if query not in inflight:
+                    break
+                # Another task is already running this query: wait for its result
+                leader = inflight[query]
+                try:
+                    return await asyncio.shield(leader)
+                except asyncio.CancelledError:
+                    if leader.cancelled() and not asyncio.current_task().cancelling():
+                        continue  # the leader was cancelled, not us: look again, maybe run it ourselves
+                    raise
+            future = inflight[query] = loop.create_future()
+            try:
+                start = time.perf_counter()
+                result = await func(conn, query, *args, **kwargs)
+            except BaseException as e:
+                if isinstance(e, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(e)
+                    future.exception()  # the waiters (if any) get it; don't warn when there are none
+                raise
+            finally:
+                inflight.pop(query, None)
+            _record_store(query, result, (time.perf_counter() - start) * 1000, backend)
+            backend.set(query, entry_for(result))
+            future.set_result(result)
+            return result
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(conn, query, *args, **kwargs):
-        if query in query_cache:
+        entry = backend.get(query)
+        freshness = _freshness(entry)
+        if freshness == "fresh":
             print("Using cached result...")
-            return query_cache[query]
+            _record_hit(query)
+            return entry.value
+        if freshness == "stale":
+            print("Using stale cached result, refreshing in background...")
+            _record_hit(query)
+            _refresh_in_background(func, query, args, kwargs, entry_for, db_file, backend)
+            return entry.value
+        start = time.perf_counter()
         result = func(conn, query, *args, **kwargs)
-        query_cache[query] = result
+        _record_store(query, result, (time.perf_counter() - start) * 1000, backend)
+        backend.set(query, entry_for(result))
         print("Caching result...")
         return result
     return wrapper
 
+# stream=True: func returns a cursor, and so does the wrapper, for
+# with_db_connection(stream=True) to wrap in a RowStream. A hit is served from
+# the cached rows; a miss copies rows as they are fetched and caches them only
+# if the cursor was read to the end and had at most max_rows rows.
+class _CachedCursor:
+    def __init__(self, rows):
+        self._rows = rows
+        self._index = 0
+
+    def fetchmany(self, size):
+        rows = self._rows[self._index:self._index + size]
+        self._index += len(rows)
+        return rows
+
+    def fetchall(self):
+        return self.fetchmany(len(self._rows))
+
+    def close(self):
+        pass
+
+class _CachingCursor:
+    def __init__(self, cursor, max_rows, on_complete):
+        self._cursor = cursor
+        self._max_rows = max_rows
+        self._on_complete = on_complete
+        self._buffer = []
+
+    def fetchmany(self, size):
+        rows = self._cursor.fetchmany(size)
+        if self._buffer is not None:
+            self._buffer.extend(rows)
+            if len(self._buffer) > self._max_rows:
+                self._buffer = None  # too big to cache: stop copying, keep streaming
+            elif len(rows) < size:
+                buffer, self._buffer = self._buffer, None
+                self._on_complete(buffer)  # read to the end
+        return rows
+
+    def fetchall(self):
+        rows = []
+        while True:
+            batch = self.fetchmany(500)
+            rows += batch
+            if len(batch) < 500:
+                return rows
+
+    def close(self):
+        self._cursor.close()
+
+def _streaming_cache_query(func, entry_for, db_file, backend, max_rows):
+    def fetch_all(conn, query, *args, **kwargs):
+        return func(conn, query, *args, **kwargs).fetchall()  # for background refreshes
+
+    @functools.wraps(func)
+    def stream_wrapper(conn, query, *args, **kwargs):
+        entry = backend.get(query)
+        freshness = _freshness(entry)
+        if freshness is not None:
+            _record_hit(query)
+            if freshness == "stale":
+                _refresh_in_background(fetch_all, query, args, kwargs, entry_for, db_file, backend)
+            return _CachedCursor(entry.value)
+        start = time.perf_counter()
+
+        def store(rows):
+            _record_store(query, rows, (time.perf_counter() - start) * 1000, backend)
+            backend.set(query, entry_for(rows))
+        return _CachingCursor(func(conn, query, *args, **kwargs), max_rows, store)
+    return stream_wrapper
+
 # Example usage
 @with_db_connection
 @cache_query
@@ -45,6 +710,78 @@ print(users)
 users_again = fetch_users_with_cache(query="SELECT * FROM users")
 print(users_again)
 
+# Dashboard query: fresh for 1s, then served stale for up to 30s while one refresh runs
+@with_db_connection
+@cache_query(ttl=1, stale_ttl=30, negative_ttl=0.5, db_file="my_database.db")
+def fetch_dashboard(conn, query):
+    return conn.execute(query).fetchall()
+
+fetch_dashboard(query="SELECT COUNT(*) FROM users")
+time.sleep(1.1)
+print(fetch_dashboard(query="SELECT COUNT(*) FROM users"))  # stale value, returned immediately
+
+# Missing rows are cached too (for negative_ttl), so repeated misses skip SQLite
+fetch_dashboard(query="SELECT * FROM users WHERE id = -1")
+fetch_dashboard(query="SELECT * FROM users WHERE id = -1")
+
+# Shared cache: every local process using query_cache.db sees the same entries
+shared_cache = SQLiteCacheBackend("query_cache.db", max_bytes=16 * 1024 * 1024)
+
+@with_db_connection
+@cache_query(ttl=60, backend=shared_cache)
+def fetch_users_shared(conn, query):
+    return conn.execute(query).fetchall()
+
+fetch_users_shared(query="SELECT * FROM users WHERE age > 30")
+
+# The demo's cache file isn't needed after this: empty it, close it, delete it
+shared_cache.clear()
+shared_cache.close()
+for suffix in ("", "-wal", "-shm"):
+    if os.path.exists("query_cache.db" + suffix):
+        os.remove("query_cache.db" + suffix)
+
+# Which keys are hot, how much memory they hold and how much time they saved
+for age in (20, 30, 40, 20, 20, 30):
+    fetch_users_with_cache(query=f"SELECT * FROM users WHERE age > {age}")
+install_report_signal()
+dump_cache_report(top_n=5)
+
+# Warm-up at startup: replay the hottest queries from last run's snapshot
+# (a log_queries JSON log works the same way)
+save_cache_snapshot("cache_snapshot.jsonl")
+query_cache.clear()
+try:
+    warm_cache(fetch_users_with_cache, "cache_snapshot.jsonl", top_n=10, max_workers=4, time_budget=1.0)
+finally:
+    os.remove("cache_snapshot.jsonl")
+print(len(query_cache), "entries after warm-up")
+
+# Coroutine functions: concurrent misses for the same query run it once
+@cache_query(ttl=60)
+async def fetch_users_async(conn, query):
+    return await conn.execute_fetchall(query)
+
+async def main():
+    async with aiosqlite.connect("my_database.db") as conn:
+        first, second = await asyncio.gather(
+            fetch_users_async(conn, "SELECT * FROM users WHERE age > 50"),
+            fetch_users_async(conn, "SELECT * FROM users WHERE age > 50"),
+        )
+    print(len(first), first is second)
+
+asyncio.run(main())
+
+# Streaming: rows arrive batch_size at a time; the first full read (under
+# max_rows) is cached and later calls stream from the cache
+@with_db_connection(stream=True, batch_size=50)
+@cache_query(ttl=60, stream=True, max_rows=1000)
+def stream_users(conn, query):
+    return conn.execute(query)
+
+for _ in range(2):
+    with stream_users(query="SELECT * FROM users WHERE age > 25") as rows:
+        print(sum(1 for _ in rows), "rows streamed")
 
 How it works:
 
@@ -53,3 +790,19 @@ with_db_connection handles opening/closing the connection.
 cache_query stores results of queries in the query_cache dictionary keyed by the SQL string.
 
 If the same query is called again, it returns the cached result instead of hitting the database.
+
+With ttl, a result is fresh for ttl seconds. For the next stale_ttl seconds (stale-while-revalidate) callers still get the old value immediately, and the first of them starts a single background refresh on its own connection to db_file; nobody waits for it. That connection is opened outside with_db_connection, so stale_ttl requires db_file and cache_query raises ValueError without it. Past ttl + stale_ttl the query runs again in the caller.
+
+With negative_ttl, empty results are cached separately for that (usually short) time and never served stale, so repeated lookups for missing rows stop hitting SQLite without hiding new rows for long.
+
+Where entries live is pluggable through backend=. MemoryCacheBackend (the default) keeps them in the query_cache dictionary of the current process. SQLiteCacheBackend keeps them in a shared WAL-mode SQLite file, so gunicorn workers or multiprocessing children share one warm cache. Values are pickled and zlib-compressed when large. Writes take BEGIN IMMEDIATE so processes never deadlock, each thread and process opens its own connection, and the least recently used entries are evicted once the stored bytes exceed max_bytes. close() closes the calling thread's connection; the demo clears and closes its query_cache.db and then deletes it. Timestamps are wall-clock (time.time()) so TTLs mean the same thing in every process.
+
+cache_report(top_n, sort_by) returns runtime statistics: per key the hits, misses, approximate result size in bytes (sys.getsizeof over the rows and their fields), age and the milliseconds saved (each hit adds what the last real query took), the same numbers grouped per query fingerprint, and totals including an estimate of the memory held. dump_cache_report() prints it, and install_report_signal() makes `kill -USR1 <pid>` print it from a running process. Sizes are of the Python result as it was stored. Only keys the backend still holds are counted: delete, clear and eviction drop their stats, and the report itself drops keys that disappeared some other way (query_cache.clear(), eviction by another process sharing a SQLiteCacheBackend), so the totals reflect what is actually cached. sort_by is one of hits, misses, size_bytes, age_s (for a fingerprint, the age of its oldest entry) or saved_ms.
+
+warm_cache(fetch, path, top_n, per_fingerprint, max_workers, time_budget) fills the cache at startup. It reads a log_queries JSON log, or a snapshot written by save_cache_snapshot(), and ranks query fingerprints by how often they ran. For each of the top_n fingerprints it replays the most common concrete statements (their literals are the parameters) through the decorated fetch function (statements logged with ? placeholders are skipped, since the log doesn't have their bound values), at most max_workers at a time. Nothing new is started after time_budget seconds and warm_cache returns without waiting for stragglers, so startup stays fast. The demo deletes its cache_snapshot.jsonl once the warm-up has read it.
+
+Plain @cache_query keeps the old behavior: results are cached forever.
+
+On an async def function cache_query returns an async wrapper with the same ttl, stale_ttl, negative_ttl, backend and statistics. Concurrent misses for the same query are single-flighted: the first task runs the query and the others await its result. If that first task is cancelled, the waiters are not: they look the query up again and one of them runs it instead. In-flight queries are tracked per event loop, and each entry is removed as soon as its query finishes, so nothing accumulates. A stale entry is refreshed by a background task on its own aiosqlite connection. Backend lookups are synchronous; they are dictionary reads for the memory backend and short local reads for SQLiteCacheBackend.
+
+With stream=True the decorated function returns a cursor instead of rows, and so does cache_query's wrapper, so with_db_connection(stream=True) (or the one in 1-with_db_connection.py) turns both a hit and a miss into a RowStream: iterable, closable and usable in a with block. A hit streams the cached rows. A miss copies rows as the caller reads them and stores them only if the cursor was read to the end and returned at most max_rows rows, so large scans never end up in the cache. ttl, stale_ttl, negative_ttl, backends and the statistics work as without streaming; a stale hit is refreshed in the background with a full fetch. Coroutine functions can't stream.
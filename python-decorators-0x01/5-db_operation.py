@@ -0,0 +1,267 @@
+a single decorator that does the job of with_db_connection, transactional, retry_on_failure, cache_query and log_queries in one wrapper, plus a microbenchmark comparing it with the stacked version. Here’s the full script:
+import io
+import re
+import sqlite3
+import time
+import timeit
+import inspect
+import functools
+import contextlib
+
+# Same SQL lookup as in 0-log_queries.py: the query/sql argument if the
+# function has one, else the first string argument that starts like SQL, so
+# an email or a name passed first is never logged
+_LOOKS_LIKE_SQL = re.compile(r"^\s*(select|insert|update|delete|replace|with|create|drop|alter|pragma|begin|commit|rollback|savepoint|release|explain|vacuum|analyze|attach|detach)\b", re.IGNORECASE)
+
+def _sql_extractor(func):
+    try:
+        params = list(inspect.signature(func).parameters)
+    except (TypeError, ValueError):
+        params = []
+    for name in ("query", "sql"):
+        if name in params:
+            index = params.index(name)
+
+            def extract(args, kwargs, name=name, index=index):
+                if name in kwargs:
+                    return kwargs[name]
+                return args[index] if len(args) > index else None
+            return extract
+
+    def extract(args, kwargs):
+        for value in (*args, *kwargs.values()):
+            if isinstance(value, str) and _LOOKS_LIKE_SQL.match(value):
+                return value
+        return None
+    return extract
+
+# Builds one wrapper for a given configuration out of closures chosen per flag.
+# Disabled features add no layer at all, so a plain db_operation() call costs
+# a single Python frame: connect, call, close.
+def _build_wrapper(func, cache_store, retries, tx, log, db_file, retry_delay, connect):
+    if not (tx or retries > 1 or cache_store is not None or log):
+        def wrapper(*args, **kwargs):
+            conn = connect(db_file)
+            try:
+                return func(conn, *args, **kwargs)
+            finally:
+                conn.close()
+        return wrapper
+
+    if tx:
+        def attempt(args, kwargs):
+            conn = connect(db_file)
+            try:
+                try:
+                    result = func(conn, *args, **kwargs)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    print(f'Transaction rolled back due to error: {e}')
+                    raise
+            finally:
+                conn.close()
+            return result
+    else:
+        def attempt(args, kwargs):
+            conn = connect(db_file)
+            try:
+                return func(conn, *args, **kwargs)
+            finally:
+                conn.close()
+
+    if retries > 1:
+        def run(args, kwargs):
+            for attempt_no in range(1, retries + 1):
+                try:
+                    return attempt(args, kwargs)
+                except Exception as e:
+                    if attempt_no == retries:
+                        raise
+                    print(f'Attempt {attempt_no} failed: {e}. Retrying in {retry_delay} seconds...')
+                    time.sleep(retry_delay)
+    else:
+        run = attempt
+
+    if cache_store is not None:
+        def cached(args, kwargs):
+            key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+            if key in cache_store:
+                return cache_store[key]
+            result = cache_store[key] = run(args, kwargs)
+            return result
+    else:
+        cached = run
+
+    if log:
+        extract_sql = _sql_extractor(func)
+
+        def wrapper(*args, **kwargs):
+            query = extract_sql(args, kwargs)
+            if query:
+                print(f'[LOG] Executing SQL query: {query}')
+            return cached(args, kwargs)
+    else:
+        def wrapper(*args, **kwargs):
+            return cached(args, kwargs)
+    return wrapper
+
+# Fused decorator: one specialized wrapper per configuration
+def db_operation(cache=False, retry=None, tx=False, log=False,
+                 db_file="my_database.db", retry_delay=2, connect=sqlite3.connect):
+    # retry: None/False = no retries, True = 3 attempts (retry_on_failure's default), or a number of attempts
+    if retry is None or retry is False:
+        retries = 1
+    elif retry is True:
+        retries = 3
+    elif isinstance(retry, int) and retry >= 1:
+        retries = retry
+    else:
+        raise ValueError(f"retry must be True, False, None or a number of attempts >= 1, got {retry!r}")
+
+    def decorator(func):
+        cache_store = {}
+        wrapper = _build_wrapper(func, cache_store if cache else None, retries, bool(tx), bool(log),
+                                 db_file, retry_delay, connect)
+        wrapper = functools.wraps(func)(wrapper)
+        wrapper.cache = cache_store
+        wrapper.cache_clear = cache_store.clear
+        return wrapper
+    return decorator
+
+# Example usage
+@db_operation(cache=True, retry=3, retry_delay=1, log=True)
+def fetch_users_with_cache(conn, query):
+    cursor = conn.cursor()
+    cursor.execute(query)
+    return cursor.fetchall()
+
+@db_operation(tx=True, retry=3, retry_delay=1)
+def update_user_email(conn, user_id, new_email):
+    conn.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+
+update_user_email(1, "Crawford_Cartwright@hotmail.com")
+users = fetch_users_with_cache(query="SELECT * FROM users")
+users_again = fetch_users_with_cache(query="SELECT * FROM users")  # served from cache, no connection opened
+print(len(users), users == users_again)
+
+
+# Microbenchmark: per-call overhead of the stacked decorators vs db_operation.
+# The stacked versions are copies of 0-log_queries.py .. 4-cache_query.py,
+# parameterized by connect so both sides can be measured against a no-op connection.
+def make_stacked_decorators(connect):
+    def with_db_connection(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            conn = connect("my_database.db")
+            try:
+                return func(conn, *args, **kwargs)
+            finally:
+                conn.close()
+        return wrapper
+
+    def log_queries(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            query = kwargs.get('query', None)
+            if query:
+                print(f"[LOG] Executing SQL query: {query}")
+            return func(*args, **kwargs)
+        return wrapper
+
+    def transactional(func):
+        @functools.wraps(func)
+        def wrapper(conn, *args, **kwargs):
+            try:
+                result = func(conn, *args, **kwargs)
+                conn.commit()
+                return result
+            except Exception as e:
+                conn.rollback()
+                print(f"Transaction rolled back due to error: {e}")
+                raise
+        return wrapper
+
+    def retry_on_failure(retries=3, delay=2):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                last_exception = None
+                for attempt in range(1, retries + 1):
+                    try:
+                        return func(*args, **kwargs)
+                    except Exception as e:
+                        last_exception = e
+                        time.sleep(delay)
+                raise last_exception
+            return wrapper
+        return decorator
+
+    return with_db_connection, log_queries, transactional, retry_on_failure
+
+class NullConnection:
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+def null_connect(db_file):
+    return NullConnection()
+
+def run_overhead_benchmark(connect, label, number=20000):
+    with_db_connection, log_queries, transactional, retry_on_failure = make_stacked_decorators(connect)
+
+    def body(conn, query):
+        return query
+
+    @log_queries
+    @with_db_connection
+    @retry_on_failure(retries=3, delay=0)
+    @transactional
+    def stacked(conn, query):
+        return body(conn, query)
+
+    @db_operation(retry=3, retry_delay=0, tx=True, log=True, connect=connect)
+    def fused(conn, query):
+        return body(conn, query)
+
+    @db_operation(connect=connect)
+    def fused_plain(conn, query):
+        return body(conn, query)
+
+    @with_db_connection
+    def stacked_plain(conn, query):
+        return body(conn, query)
+
+    print(f"\n{label} ({number} calls each)")
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, fn in [("stacked (log+conn+retry+tx)", stacked),
+                         ("fused   (log+conn+retry+tx)", fused),
+                         ("stacked (conn only)", stacked_plain),
+                         ("fused   (conn only)", fused_plain)]:
+            fn(query="SELECT 1")
+            results[name] = min(timeit.repeat(lambda: fn(query="SELECT 1"), number=number, repeat=3)) / number
+    for name, seconds in results.items():
+        print(f"  {name:<30} {seconds * 1e6:8.2f} us/call")
+
+run_overhead_benchmark(null_connect, "Decorator overhead (no-op connection)")
+run_overhead_benchmark(sqlite3.connect, "End to end (sqlite3.connect per call)", number=2000)
+
+How it works:
+
+db_operation(cache=..., retry=..., tx=..., log=...) builds a single wrapper for that exact combination of features out of small closures, picking one variant per flag (with or without a transaction, with or without retries, cache and log). Features you turn off add no layer, and with only the connection enabled the wrapper connects, calls and closes inline, in one frame instead of five.
+
+The order inside the wrapper is log, cache lookup, then retry around connect + transaction + call. A cache hit therefore never opens a connection, and a retry gets a fresh connection instead of reusing a broken one.
+
+With log=True the SQL is taken from the query or sql argument if the function has one, or else from the first string argument that starts with an SQL keyword (as in 0-log_queries.py), so other string arguments are never printed.
+
+retry=N makes up to N attempts and retry=True means 3, as retry_on_failure's default; anything else (0, a negative number, a string) raises ValueError instead of quietly disabling retries.
+
+The cache is keyed by all positional and keyword arguments, and each decorated function gets its own dictionary (wrapper.cache / wrapper.cache_clear()).
+
+The benchmark at the bottom times the stacked decorators from the earlier files against db_operation, first against a no-op connection (pure decorator overhead) and then against a real sqlite3.connect.
@@ -0,0 +1,207 @@
+a batching decorator for single-row writes like update_user_email: calls made within a short window (or until N calls are waiting) are written with one executemany in one transaction, and each caller gets a Future for its own row. Here’s the full script with a benchmark:
+import time
+import queue
+import atexit
+import sqlite3
+import functools
+import threading
+from concurrent.futures import Future, wait
+
+# Collects parameter tuples for one SQL statement and writes them in batches
+class WriteBatcher:
+    def __init__(self, sql, db_file="my_database.db", max_batch=500, max_delay=0.01):
+        self.sql = sql
+        self.db_file = db_file
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.rows_written = 0
+        self.batches = 0
+        self._queue = queue.Queue()
+        self._ready = threading.Event()
+        self._startup_error = None
+        self._thread = threading.Thread(target=self._run, name="write-batcher", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._startup_error is not None:
+            # e.g. the file can't be opened: fail here instead of leaving every Future pending
+            raise self._startup_error
+        atexit.register(self.close)
+
+    def submit(self, params):
+        future = Future()
+        self._queue.put((params, future))
+        return future
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        try:
+            conn = sqlite3.connect(self.db_file, isolation_level=None)
+        except BaseException as e:
+            self._startup_error = e
+            return
+        finally:
+            self._ready.set()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                batch = [item]
+                deadline = time.monotonic() + self.max_delay
+                stop = False
+                while len(batch) < self.max_batch:
+                    try:
+                        item = self._queue.get_nowait()  # drain what is already waiting first
+                    except queue.Empty:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        try:
+                            item = self._queue.get(timeout=remaining)
+                        except queue.Empty:
+                            break
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+                try:
+                    self._write(conn, batch)
+                except Exception as e:
+                    # Last resort (e.g. ROLLBACK itself failed): fail this batch,
+                    # keep the thread alive for the next one
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _write(self, conn, batch):
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(self.sql, [params for params, _ in batch])
+            conn.execute("COMMIT")
+        except Exception:
+            # Not only sqlite3.Error: a bad parameter (say an int too big for
+            # SQLite) raises OverflowError, TypeError, ...
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            # Some row is bad: redo the batch one row per savepoint so only
+            # the failing callers get an error and the rest still commit.
+            self._write_one_by_one(conn, batch)
+            return
+        self._done(batch)
+        for _, future in batch:
+            future.set_result(None)
+
+    def _write_one_by_one(self, conn, batch):
+        outcomes = []
+        try:
+            conn.execute("BEGIN")
+            for params, future in batch:
+                conn.execute("SAVEPOINT row")
+                try:
+                    conn.execute(self.sql, params)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO SAVEPOINT row")
+                    outcomes.append((future, e))
+                else:
+                    outcomes.append((future, None))
+                conn.execute("RELEASE SAVEPOINT row")
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self._done(batch)
+        for future, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(None)
+
+    def _done(self, batch):
+        self.batches += 1
+        self.rows_written += len(batch)
+
+# Decorator: the function maps its arguments to the statement's parameters,
+# and calling it queues the row and returns a Future.
+def batch_writes(sql, db_file="my_database.db", max_batch=500, max_delay=0.01):
+    def decorator(func):
+        batcher = WriteBatcher(sql, db_file, max_batch, max_delay)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return batcher.submit(func(*args, **kwargs))
+        wrapper.batcher = batcher
+        return wrapper
+    return decorator
+
+# Example usage
+@batch_writes("UPDATE users SET email = ? WHERE id = ?", max_batch=500, max_delay=0.01)
+def update_user_email(user_id, new_email):
+    return (new_email, user_id)
+
+# Fire off many updates; each returns a Future for its own row
+futures = [update_user_email(user_id, f"user{user_id}@example.com") for user_id in range(1, 101)]
+wait(futures)
+print(all(f.exception() is None for f in futures), update_user_email.batcher.batches, "batch(es)")
+
+# Per-item errors: the duplicate primary key fails on its own, the other row is written
+@batch_writes("INSERT INTO users (id, name, email, age) VALUES (?, ?, ?, ?)")
+def insert_user(user_id, name, email, age):
+    return (user_id, name, email, age)
+
+ok, duplicate = insert_user(100001, "New User", "new@example.com", 30), insert_user(1, "Dup", "dup@example.com", 30)
+print(ok.result(), repr(duplicate.exception()))
+
+# Remove the demo row again so the example can be rerun
+conn = sqlite3.connect("my_database.db")
+with conn:
+    conn.execute("DELETE FROM users WHERE id = ?", (100001,))
+conn.close()
+
+
+# Benchmark: rows per second for the usual loop (a connection and a commit per
+# row, like @with_db_connection @transactional update_user_email) vs batches.
+# How big the gap gets depends mostly on how long an fsync takes on your disk.
+def run_benchmark(rows=2000):
+    start = time.perf_counter()
+    for i in range(rows):
+        conn = sqlite3.connect("my_database.db")
+        conn.execute("UPDATE users SET age = age WHERE id = ?", (i % 100 + 1,))
+        conn.commit()  # one transaction (and one fsync) per row
+        conn.close()
+    one_by_one = rows / (time.perf_counter() - start)
+
+    @batch_writes("UPDATE users SET age = age WHERE id = ?", max_batch=1000, max_delay=0.005)
+    def touch_user(user_id):
+        return (user_id,)
+
+    start = time.perf_counter()
+    wait([touch_user(i % 100 + 1) for i in range(rows)])
+    batched = rows / (time.perf_counter() - start)
+    touch_user.batcher.close()
+
+    print(f"\n{rows} single-row updates")
+    print(f"  one transaction per row: {one_by_one:>10.0f} rows/s")
+    print(f"  coalesced executemany:   {batched:>10.0f} rows/s ({touch_user.batcher.batches} transactions)")
+
+run_benchmark()
+
+How it works:
+
+batch_writes(sql, max_batch=..., max_delay=...) wraps a function that turns its arguments into the parameter tuple for sql. Calling the decorated function only queues that tuple and returns a concurrent.futures.Future, which resolves to None once the row is committed or to the exception that row raised.
+
+A WriteBatcher thread takes the first queued row, waits up to max_delay for more (or until max_batch rows are waiting) and writes them all with one executemany inside one BEGIN/COMMIT, so there is one commit (and one fsync) per batch instead of per row.
+
+If executemany fails, the batch is rolled back and replayed row by row, each row in its own savepoint and all in one transaction. Only the failing rows' Futures get the exception (any exception, not just sqlite3 errors, e.g. OverflowError for an integer too big for SQLite); the rest are committed. The writer thread keeps running either way. If the writer can't open the database at all, creating the WriteBatcher (that is, decorating the function) raises the error, instead of handing out Futures that never resolve.
+
+The benchmark compares committing every row with coalesced batches.
@@ -0,0 +1,197 @@
+a statement cache layer for long-lived connections: each thread keeps one connection, SQLite reuses compiled statements keyed by SQL text, and we count how often that reuse actually happens. Here’s the full script with a microbenchmark:
+import time
+import sqlite3
+import functools
+import threading
+from collections import OrderedDict
+
+# sqlite3 already keeps an LRU of compiled statements per connection, keyed by
+# the SQL text (cached_statements, default 128). A new connection per call
+# throws it away every time. StatementCache keeps a long-lived connection and
+# mirrors that LRU so hits and misses can be counted. Anything else (cursor,
+# close, in_transaction, row_factory, ...) goes to the connection, so it can be
+# used wherever a sqlite3 connection is expected.
+class StatementCache:
+    def __init__(self, db_file, size=128):
+        self.size = size
+        # Only the owning thread uses it, but once that thread has ended the
+        # connection is closed from whichever thread notices (see _prune_dead)
+        self.conn = sqlite3.connect(db_file, cached_statements=size, check_same_thread=False)
+        self.hits = 0
+        self.misses = 0
+        self._lru = OrderedDict()
+
+    def _track(self, sql):
+        if sql in self._lru:
+            self._lru.move_to_end(sql)
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._lru[sql] = None
+            if len(self._lru) > self.size:
+                self._lru.popitem(last=False)
+
+    def execute(self, sql, params=()):
+        self._track(sql)
+        return self.conn.execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        self._track(sql)
+        return self.conn.executemany(sql, seq_of_params)
+
+    def cursor(self, *args, **kwargs):
+        return _CountingCursor(self, self.conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    # Dunder methods skip __getattr__, so "with conn:" is passed on explicitly
+    def __enter__(self):
+        self.conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self.conn.__exit__(exc_type, exc_value, traceback)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+# Cursor from StatementCache.cursor(): counts its statements in the same LRU
+class _CountingCursor:
+    def __init__(self, cache, cursor):
+        self._cache = cache
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        self._cache._track(sql)
+        self._cursor.execute(sql, params)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cache._track(sql)
+        self._cursor.executemany(sql, seq_of_params)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+# One StatementCache per thread and database file (sqlite3 connections stay in
+# the thread that made them), kept for the life of the thread. When a thread
+# has ended, its connections are closed and their counts kept in _retired.
+_local = threading.local()
+_all_caches = []  # (thread, cache)
+_all_caches_lock = threading.Lock()
+_retired = {"connections": 0, "hits": 0, "misses": 0}
+
+# Call with _all_caches_lock held
+def _prune_dead():
+    alive = []
+    for thread, cache in _all_caches:
+        if thread.is_alive():
+            alive.append((thread, cache))
+        else:
+            cache.conn.close()
+            _retired["connections"] += 1
+            _retired["hits"] += cache.hits
+            _retired["misses"] += cache.misses
+    _all_caches[:] = alive
+
+def get_statement_cache(db_file="my_database.db", size=128):
+    caches = getattr(_local, "caches", None)
+    if caches is None:
+        caches = _local.caches = {}
+    cache = caches.get(db_file)
+    if cache is None:
+        cache = caches[db_file] = StatementCache(db_file, size)
+        with _all_caches_lock:
+            _prune_dead()
+            _all_caches.append((threading.current_thread(), cache))
+    return cache
+
+def statement_cache_stats():
+    with _all_caches_lock:
+        _prune_dead()
+        hits = _retired["hits"] + sum(cache.hits for _, cache in _all_caches)
+        misses = _retired["misses"] + sum(cache.misses for _, cache in _all_caches)
+        connections = len(_all_caches)
+    total = hits + misses
+    return {
+        "connections": connections,
+        "closed_connections": _retired["connections"],
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+    }
+
+# Decorator to pass a long-lived, statement-caching connection to the function
+def with_db_connection(func=None, *, db_file="my_database.db", statement_cache_size=128):
+    if func is None:
+        return lambda f: with_db_connection(f, db_file=db_file, statement_cache_size=statement_cache_size)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        conn = get_statement_cache(db_file, statement_cache_size)
+        try:
+            return func(conn, *args, **kwargs)
+        finally:
+            if conn.in_transaction:
+                conn.rollback()  # don't leak an open transaction into the next call
+    return wrapper
+
+# Example usage
+@with_db_connection
+def get_user_by_id(conn, user_id):
+    return conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+
+for user_id in range(1, 101):
+    user = get_user_by_id(user_id)
+print(user, statement_cache_stats())
+
+
+# Microbenchmark: repeated SELECT * FROM users WHERE id = ? lookups
+def run_benchmark(lookups=20000):
+    sql = "SELECT * FROM users WHERE id = ?"
+
+    def connection_per_call():
+        for i in range(lookups // 10):  # much slower, so fewer calls
+            conn = sqlite3.connect("my_database.db")
+            conn.execute(sql, (i % 100 + 1,)).fetchone()
+            conn.close()
+        return lookups // 10
+
+    def long_lived(size):
+        def run():
+            cache = StatementCache("my_database.db", size)
+            for i in range(lookups):
+                cache.execute(sql, (i % 100 + 1,)).fetchone()
+            cache.conn.close()
+            return lookups
+        return run
+
+    print(f"\n{sql!r}")
+    for label, run in [("new connection per call", connection_per_call),
+                       ("long-lived, no statement cache", long_lived(0)),
+                       ("long-lived, statement cache 128", long_lived(128))]:
+        start = time.perf_counter()
+        calls = run()
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<32} {elapsed / calls * 1e6:8.2f} us/lookup")
+
+run_benchmark()
+
+How it works:
+
+sqlite3 caches compiled statements per connection, keyed by the exact SQL text, in an LRU of cached_statements entries. That only helps if the connection lives longer than one call and the SQL text is stable (use ? parameters, not f-strings).
+
+with_db_connection here hands every call the same StatementCache for its thread and database file, so the connection and its compiled statements are reused across calls. statement_cache_size sets cached_statements for that connection.
+
+StatementCache mirrors sqlite3's LRU on the SQL text to count hits and misses, for conn.execute, conn.executemany and statements run through conn.cursor(). Everything else is passed through to the underlying connection, so code written for a plain sqlite3 connection (conn.close(), conn.in_transaction, conn.row_factory, ...) works unchanged.
+
+statement_cache_stats() sums the counts over all connections and returns the hit rate. Connections belong to their thread: once a thread has ended, the next get_statement_cache or statement_cache_stats call closes its connections and folds their counts into the totals, so short-lived threads don't leave connections open.
+
+The microbenchmark times the same point lookup with a new connection per call, with a long-lived connection but no statement cache, and with a long-lived cached connection.